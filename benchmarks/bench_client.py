@@ -0,0 +1,138 @@
+"""
+Throughput and latency of the main client methods against the local mock server,
+comparing one-at-a-time calls with the batched and concurrent code paths. Run it from
+the repository root:
+
+    python -m benchmarks.bench_client [--latency 0.02] [--products 5000] [--positions 500] [--repeat 5]
+
+Nothing here talks to DeGiro: every request goes to a MockDeGiroServer on localhost,
+so runs are repeatable and can be compared before and after a change.
+"""
+import argparse
+import asyncio
+import copy
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import degiroapi
+from degiroapi.datatypes import Data
+from benchmarks.mock_server import MockDeGiroServer
+
+
+def report(name, timings, operations, requests):
+    """Prints the median and 95th percentile of timings (seconds per run), operations per second and requests per run."""
+    timings = sorted(timings)
+    p50 = statistics.median(timings)
+    p95 = timings[int(round(0.95 * (len(timings) - 1)))]
+    print(f'{name:48s} {p50 * 1000:9.1f} {p95 * 1000:9.1f} {operations / p50:10.0f} {requests / len(timings):9.1f}')
+
+
+def run(name, function, operations, server, repeat):
+    requests_before = server.requests
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    report(name, timings, operations, server.requests - requests_before)
+
+
+def sync_cases(degiro, args):
+    product_ids = list(range(1, args.batch + 1))
+    today = datetime.now()
+    isins = ['NL%010d' % product_id for product_id in product_ids]
+    cached = copy.copy(degiro)
+    cached.response_cache = degiroapi.ResponseCache()
+    return [
+        ('product_info x%d (loop)' % len(product_ids),
+         lambda: [degiro.product_info(product_id) for product_id in product_ids], len(product_ids)),
+        ('product_infos x%d' % len(product_ids),
+         lambda: degiro.product_infos(product_ids), len(product_ids)),
+        ('real_time_price x%d (loop)' % len(product_ids),
+         lambda: [degiro.real_time_price(product_id, 'P1D') for product_id in product_ids], len(product_ids)),
+        ('real_time_prices x%d' % len(product_ids),
+         lambda: degiro.real_time_prices(product_ids, 'P1D'), len(product_ids)),
+        ('get_stock_list_by_country workers=1',
+         lambda: degiro.get_stock_list_by_country(886, page_size=500), args.products),
+        ('get_stock_list_by_country workers=%d' % args.workers,
+         lambda: degiro.get_stock_list_by_country(886, page_size=500, workers=args.workers), args.products),
+        ('orders_range 2y workers=1',
+         lambda: list(degiro.orders_range(today - timedelta(days=730), today, workers=1)), 1),
+        ('orders_range 2y workers=%d' % args.workers,
+         lambda: list(degiro.orders_range(today - timedelta(days=730), today, workers=args.workers)), 1),
+        ('company_ratios x%d' % len(isins),
+         lambda: [degiro.company_ratios(isin) for isin in isins], len(isins)),
+        ('company_ratios x%d (response_cache)' % len(isins),
+         lambda: [cached.company_ratios(isin) for isin in isins], len(isins)),
+        ('getdata portfolio (full)',
+         lambda: degiro.getdata(Data.Type.PORTFOLIO), args.positions),
+        ('getdata portfolio (incremental)',
+         lambda: degiro.getdata(Data.Type.PORTFOLIO, incremental=True), args.positions),
+    ]
+
+
+def async_cases(args):
+    product_ids = list(range(1, args.batch + 1))
+
+    async def product_info_gather(degiro):
+        await asyncio.gather(*[degiro.product_info(product_id) for product_id in product_ids])
+
+    async def real_time_price_gather(degiro):
+        await asyncio.gather(*[degiro.real_time_price(product_id, 'P1D') for product_id in product_ids])
+
+    async def stock_list(degiro):
+        await degiro.get_stock_list_by_country(886, page_size=500, workers=args.workers)
+
+    return [
+        ('async product_info x%d (gather)' % len(product_ids), product_info_gather, len(product_ids)),
+        ('async real_time_price x%d (gather)' % len(product_ids), real_time_price_gather, len(product_ids)),
+        ('async get_stock_list_by_country workers=%d' % args.workers, stock_list, args.products),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds the server waits before each response')
+    parser.add_argument('--products', type=int, default=5000, help='stocks in the universe')
+    parser.add_argument('--positions', type=int, default=500, help='portfolio positions')
+    parser.add_argument('--batch', type=int, default=50, help='products per product_info / price case')
+    parser.add_argument('--workers', type=int, default=8, help='workers for the concurrent cases')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-async', action='store_true', help='skip the AsyncDeGiro cases')
+    args = parser.parse_args(argv)
+
+    with MockDeGiroServer(latency=args.latency, products=args.products,
+                          portfolio_positions=args.positions) as server:
+        print(f'mock server at {server.url}, latency {args.latency * 1000:.0f} ms, {args.repeat} runs per case')
+        print(f'{"case":48s} {"p50 ms":>9s} {"p95 ms":>9s} {"ops/s":>10s} {"requests":>9s}')
+
+        degiro = degiroapi.DeGiro(transport=degiroapi.Transport(pool_size=args.workers, base_urls=server.base_urls))
+        degiro.login('mockuser', 'password')
+        for name, function, operations in sync_cases(degiro, args):
+            run(name, function, operations, server, args.repeat)
+        degiro.transport.close()
+
+        if args.no_async:
+            return
+
+        async def run_async():
+            async with degiroapi.AsyncDeGiro(transport=degiroapi.AsyncTransport(base_urls=server.base_urls)) as adegiro:
+                await adegiro.login('mockuser', 'password')
+                for name, function, operations in async_cases(args):
+                    timings = []
+                    requests_before = server.requests
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        await function(adegiro)
+                        timings.append(time.perf_counter() - started)
+                    report(name, timings, operations, server.requests - requests_before)
+
+        try:
+            asyncio.run(run_async())
+        except ImportError as e:
+            print(f'async cases skipped: {e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Decoding time of the large responses (stock list, transactions, portfolio update) per JSON backend.
+
+    python -m benchmarks.bench_decode [products] [repeat]    (from the repository root)
+"""
+import json
+import sys
+import timeit
+from datetime import date, timedelta
+
+from degiroapi.core import Request
+from degiroapi.decoding import JSONDecoder, BACKENDS, _installed
+from benchmarks.mock_server import MockDeGiroServer
+
+
+def main(products=20000, repeat=5):
+    server = MockDeGiroServer(products=products, portfolio_positions=products // 4)
+    start = date(2020, 1, 1)
+    bodies = [
+        ('stocks', 'StockList', server.route('GET', '/products_s/secure/v5/stocks', {'limit': [str(products)]}, b'')[1]),
+        ('transactions 3y', 'Transactions',
+         {'data': [t for n in range(3 * 365) for t in server.transactions_on(start + timedelta(days=n))]}),
+        ('update portfolio', 'Update', server.update({'portfolio': ['0']})),
+    ]
+    server.stop()
+    decoders = [JSONDecoder(backend) for backend in BACKENDS if backend == 'json' or _installed(backend)]
+    if _installed('msgspec'):
+        decoders.append(JSONDecoder('msgspec', typed=True))
+
+    print(f'best of {repeat}')
+    for name, schema, payload in bodies:
+        body = json.dumps(payload).encode()
+        request = Request('https://trader.degiro.nl/', schema=schema)
+        for decoder in decoders:
+            best = min(timeit.repeat(lambda: request.parse(200, body, decoder), number=1, repeat=repeat))
+            label = f'{name} ({len(body) / 1e6:.1f} MB) {decoder.backend}{" typed" if decoder.typed else ""}'
+            print(f'{label:48s} {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark of the portfolio parser against the previous filterportfolio implementation.
+
+    python -m benchmarks.bench_portfolio [positions] [repeat]    (from the repository root)
+"""
+import importlib.util
+import random
+import sys
+import timeit
+
+from degiroapi.portfolio import parse_portfolio
+
+
+def legacy_filterportfolio(portfolio, filter_zero=None):
+    # filterportfolio as it was before parse_portfolio, kept as the baseline
+    data = []
+    data_non_zero = []
+    for item in portfolio['portfolio']['value']:
+        positionType = size = price = value = breakEvenPrice = None
+        for i in item['value']:
+            size = i['value'] if i['name'] == 'size' else size
+            positionType = i['value'] if i['name'] == 'positionType' else positionType
+            price = i['value'] if i['name'] == 'price' else price
+            value = i['value'] if i['name'] == 'value' else value
+            breakEvenPrice = i['value'] if i['name'] == 'breakEvenPrice' else breakEvenPrice
+        data.append({
+            "id": item['id'],
+            "positionType": positionType,
+            "size": size,
+            "price": price,
+            "value": value,
+            "breakEvenPrice": breakEvenPrice
+        })
+    if filter_zero:
+        for d in data:
+            if d['size'] != 0.0:
+                data_non_zero.append(d)
+        return data_non_zero
+    else:
+        return data
+
+
+def synthetic_portfolio(positions, seed=0):
+    """An update response portfolio block shaped like DeGiro's, with the usual ~14 fields per position."""
+    rnd = random.Random(seed)
+    value = []
+    for n in range(positions):
+        size = rnd.choice([0, 0, rnd.randint(1, 500)])
+        price = round(rnd.uniform(1, 500), 2)
+        fields = {
+            'id': str(1000000 + n),
+            'positionType': rnd.choice(['PRODUCT', 'CASH']),
+            'size': size,
+            'price': price,
+            'value': round(size * price, 2),
+            'accruedInterest': None,
+            'plBase': {'EUR': round(rnd.uniform(-1000, 0), 2)},
+            'todayPlBase': {'EUR': round(rnd.uniform(-1000, 0), 2)},
+            'portfolioValueCorrection': 0,
+            'breakEvenPrice': round(price * rnd.uniform(0.8, 1.2), 4),
+            'averageFxRate': 1,
+            'realizedProductPl': round(rnd.uniform(-50, 50), 2),
+            'realizedFxPl': 0,
+            'todayRealizedProductPl': 0,
+            'todayRealizedFxPl': 0,
+        }
+        value.append({'id': fields['id'], 'name': 'positionrow', 'isAdded': True,
+                      'value': [{'name': name, 'value': v, 'isAdded': True} for name, v in fields.items()]})
+    return {'portfolio': {'lastUpdated': 1, 'name': 'portfolio', 'value': value}}
+
+
+def main(positions=20000, repeat=5):
+    portfolio = synthetic_portfolio(positions)
+    assert parse_portfolio(portfolio) == legacy_filterportfolio(portfolio)
+    assert parse_portfolio(portfolio, filter_zero=True) == legacy_filterportfolio(portfolio, True)
+
+    cases = [
+        ('legacy filterportfolio', lambda: legacy_filterportfolio(portfolio)),
+        ('legacy filterportfolio filter_zero', lambda: legacy_filterportfolio(portfolio, True)),
+        ('parse_portfolio rows', lambda: parse_portfolio(portfolio)),
+        ('parse_portfolio rows filter_zero', lambda: parse_portfolio(portfolio, filter_zero=True)),
+        ('parse_portfolio all fields', lambda: parse_portfolio(portfolio, fields=None)),
+        ('parse_portfolio columnar', lambda: parse_portfolio(portfolio, columnar=True)),
+    ]
+    if importlib.util.find_spec('numpy') is not None:
+        cases.append(('parse_portfolio numpy', lambda: parse_portfolio(portfolio, columnar='numpy')))
+
+    print(f'{positions} positions, best of {repeat}')
+    for name, function in cases:
+        best = min(timeit.repeat(function, number=1, repeat=repeat))
+        print(f'{name:40s} {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
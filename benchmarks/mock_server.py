@@ -0,0 +1,469 @@
+"""
+Local HTTP stand-in for the DeGiro and vwd endpoints the client uses, for benchmarks.
+
+    server = MockDeGiroServer(latency=0.02, products=20000)
+    server.start()
+    degiro = degiroapi.DeGiro(transport=degiroapi.Transport(base_urls=server.base_urls))
+    degiro.login('user', 'password')
+    ...
+    server.stop()
+
+Responses are generated deterministically (same request, same answer) in the shapes the
+real endpoints return. latency is added to every response; products, portfolio_positions,
+orders_per_day, transactions_per_day and max_points control the payload sizes, and raising
+news_published publishes more news. GET
+responses carry an ETag and are answered with 304 Not Modified when it matches If-None-Match.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CURRENCIES = ('EUR', 'USD', 'GBP', 'CHF', 'JPY', 'SEK')
+DURATION_SECONDS = {'S': 1, 'M': 60, 'H': 3600}
+PERIOD_DAYS = {'D': 1, 'W': 7, 'M': 30, 'Y': 365}
+
+
+def parse_time(value):
+    return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+
+
+def duration_seconds(duration):
+    """Seconds in an ISO 8601 duration such as 'PT1M', 'P1D' or 'P50Y'."""
+    match = re.fullmatch(r'P(?:(\d+)([DWMY]))?(?:T(\d+)([HMS]))?', duration)
+    if not match:
+        raise ValueError(duration)
+    seconds = 0
+    if match.group(1):
+        seconds += int(match.group(1)) * PERIOD_DAYS[match.group(2)] * 86400
+    if match.group(3):
+        seconds += int(match.group(3)) * DURATION_SECONDS[match.group(4)]
+    return seconds
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops connections when a client opens its whole pool at once
+    request_queue_size = 256
+
+
+class MockDeGiroServer:
+
+    def __init__(self, latency=0.0, products=5000, portfolio_positions=500, orders_per_day=5,
+                 transactions_per_day=5, max_points=5000, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.products = products
+        self.portfolio_positions = portfolio_positions
+        self.orders_per_day = orders_per_day
+        self.transactions_per_day = transactions_per_day
+        self.max_points = max_points
+        self.account_id = 1234567
+        self.client_id = 7654321
+        self.session_id = 'MOCKSESSION.prod_b_112_1'
+        self.requests = 0
+        self.news_published = 0
+        self.__version = 1
+        self.__lock = threading.Lock()
+        self.__server = _Server((host, port), self.__handler())
+        self.__thread = None
+
+    @property
+    def url(self):
+        host, port = self.__server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def base_urls(self):
+        """Transport base_urls sending both the trader and the vwd charting host here."""
+        return {'https://trader.degiro.nl': self.url, 'https://charting.vwdservices.com': self.url}
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self.url
+
+    def stop(self):
+        if self.__thread is not None:
+            self.__server.shutdown()
+            self.__thread = None
+        self.__server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # fixtures
+
+    def product(self, product_id):
+        rnd = random.Random(int(product_id))
+        price = round(rnd.uniform(1, 500), 2)
+        return {
+            'id': str(product_id),
+            'name': f'Company {product_id} NV',
+            'isin': 'NL%010d' % int(product_id),
+            'symbol': 'C%d' % int(product_id),
+            'contractSize': 1.0,
+            'productType': 'STOCK',
+            'productTypeId': 1,
+            'tradable': True,
+            'category': 'A',
+            'currency': rnd.choice(CURRENCIES),
+            'exchangeId': str(rnd.choice([194, 196, 200, 663, 676])),
+            'onlyEodPrices': False,
+            'orderTimeTypes': ['DAY', 'GTC'],
+            'buyOrderTypes': ['LIMIT', 'MARKET', 'STOPLOSS', 'STOPLIMIT'],
+            'sellOrderTypes': ['LIMIT', 'MARKET', 'STOPLOSS', 'STOPLIMIT'],
+            'closePrice': price,
+            'closePriceDate': '2023-01-13',
+            'feedQuality': 'R',
+            'orderBookDepth': 0,
+            'vwdIdentifierType': 'issueid',
+            'vwdId': str(360000000 + int(product_id)),
+            'qualitySwitchable': False,
+            'qualitySwitchFree': False,
+            'vwdModuleId': 21,
+        }
+
+    def portfolio_row(self, n, version):
+        rnd = random.Random(n * 7919 + version)
+        size = 0 if n % 4 == 0 else random.Random(n).randint(1, 500)
+        price = round(rnd.uniform(1, 500), 2)
+        fields = {
+            'id': str(1000 + n), 'positionType': 'PRODUCT', 'size': size, 'price': price,
+            'value': round(size * price, 2), 'accruedInterest': None, 'plBase': {'EUR': -round(size * price * 0.9, 2)},
+            'todayPlBase': {'EUR': -round(size * price * 0.99, 2)}, 'portfolioValueCorrection': 0,
+            'breakEvenPrice': round(price * 0.9, 4), 'averageFxRate': 1, 'realizedProductPl': 0,
+            'realizedFxPl': 0, 'todayRealizedProductPl': 0, 'todayRealizedFxPl': 0,
+        }
+        return {'id': fields['id'], 'name': 'positionrow', 'isAdded': True,
+                'value': [{'name': name, 'value': value, 'isAdded': True} for name, value in fields.items()]}
+
+    def update(self, query):
+        with self.__lock:
+            self.__version += 1
+            version = self.__version
+        response = {}
+        for datatype in ('portfolio', 'cashFunds', 'orders', 'totalPortfolio'):
+            if datatype not in query:
+                continue
+            token = int(query[datatype][0])
+            if datatype == 'portfolio':
+                if token == 0:
+                    rows = [self.portfolio_row(n, version) for n in range(self.portfolio_positions)]
+                else:
+                    changed = random.Random(version).sample(range(self.portfolio_positions),
+                                                            max(1, self.portfolio_positions // 100))
+                    rows = [{'id': str(1000 + n), 'name': 'positionrow',
+                             'value': [{'name': 'price', 'value': round(random.Random(n + version).uniform(1, 500), 2)}]}
+                            for n in changed]
+                value = rows
+            elif datatype == 'cashFunds':
+                value = [] if token else [
+                    {'id': str(n), 'name': 'cashFund', 'isAdded': True,
+                     'value': [{'name': 'id', 'value': n}, {'name': 'currencyCode', 'value': currency},
+                               {'name': 'value', 'value': round(random.Random(n).uniform(0, 10000), 2)}]}
+                    for n, currency in enumerate(CURRENCIES)]
+            elif datatype == 'orders':
+                value = [] if token else [
+                    {'id': order['orderId'], 'name': 'order', 'isAdded': True,
+                     'value': [{'name': 'id', 'value': order['orderId']}] +
+                              [{'name': name, 'value': order[name]} for name in
+                               ('date', 'productId', 'buysell', 'size', 'quantity', 'price', 'stopPrice',
+                                'orderTypeId', 'orderTimeTypeId', 'isModifiable', 'isDeletable')]}
+                    for order in self.orders_on(datetime.now().date()) if order['isActive']]
+            else:
+                value = [{'name': 'degiroCash', 'value': 1000.0 + version}, {'name': 'totalCash', 'value': 2000.0}]
+            response[datatype] = {'lastUpdated': version, 'name': datatype, 'value': value}
+        return response
+
+    def orders_on(self, day):
+        rnd = random.Random(day.toordinal())
+        orders = []
+        for n in range(self.orders_per_day):
+            created = datetime(day.year, day.month, day.day, 9) + timedelta(minutes=rnd.randint(0, 480))
+            orders.append({
+                'orderId': str(uuid.UUID(int=day.toordinal() * 1000 + n)),
+                'created': created.strftime('%Y-%m-%dT%H:%M:%S+01:00'),
+                'date': created.strftime('%Y-%m-%dT%H:%M:%S+01:00'),
+                'productId': rnd.randint(1, self.products),
+                'size': rnd.randint(1, 100), 'quantity': rnd.randint(1, 100),
+                'price': round(rnd.uniform(1, 500), 2), 'stopPrice': 0,
+                'buysell': rnd.choice('BS'), 'orderTypeId': rnd.choice([0, 2]), 'orderTimeTypeId': rnd.choice([1, 3]),
+                'currentTradedSize': 0, 'totalTradedSize': 0, 'type': 'CREATE', 'status': 'CONFIRMED',
+                'last': created.strftime('%Y-%m-%dT%H:%M:%S+01:00'),
+                'isActive': day >= datetime.now().date() - timedelta(days=2) and n % 2 == 0,
+                'isModifiable': True, 'isDeletable': True,
+            })
+        return orders
+
+    def transactions_on(self, day):
+        rnd = random.Random(-day.toordinal())
+        transactions = []
+        for n in range(self.transactions_per_day):
+            quantity = rnd.randint(-100, 100) or 1
+            price = round(rnd.uniform(1, 500), 2)
+            transactions.append({
+                'id': day.toordinal() * 100 + n, 'productId': rnd.randint(1, self.products),
+                'date': (datetime(day.year, day.month, day.day, 9) + timedelta(minutes=rnd.randint(0, 480)))
+                .strftime('%Y-%m-%dT%H:%M:%S+01:00'),
+                'buysell': 'B' if quantity > 0 else 'S', 'price': price, 'quantity': quantity,
+                'total': -round(quantity * price, 2), 'orderTypeId': 0, 'counterParty': 'MK',
+                'transfered': False, 'fxRate': 1, 'totalInBaseCurrency': -round(quantity * price, 2),
+                'feeInBaseCurrency': -2.0, 'totalPlusFeeInBaseCurrency': -round(quantity * price, 2) - 2.0,
+                'transactionTypeId': 0, 'tradingVenue': 'XAMS',
+            })
+        return transactions
+
+    @staticmethod
+    def date_range(query):
+        from_date = datetime.strptime(query['fromDate'][0], '%d/%m/%Y').date()
+        to_date = datetime.strptime(query['toDate'][0], '%d/%m/%Y').date()
+        while from_date <= to_date:
+            yield from_date
+            from_date += timedelta(days=1)
+
+    def chart(self, query):
+        resolution = query.get('resolution', ['PT1M'])[0]
+        period = query.get('period', ['P1D'])[0]
+        step = duration_seconds(resolution)
+        points = min(self.max_points, max(1, duration_seconds(period) // step))
+        end = datetime(2023, 1, 13, 17, 30)
+        start = end - timedelta(seconds=points * step)
+        series = []
+        for series_id in query.get('series', []):
+            parts = series_id.split(':')
+            issue = int(parts[-1]) if parts[-1].isdigit() else 0
+            rnd = random.Random(issue)
+            last = round(rnd.uniform(1, 500), 4)
+            if len(parts) == 2:
+                series.append({'expires': '2023-01-13T17:31:00+01:00', 'id': series_id, 'type': 'object', 'data': {
+                    'issueId': issue, 'companyId': issue % 100000, 'name': f'Company {issue}',
+                    'identifier': series_id, 'isin': 'NL%010d' % (issue % 10 ** 10), 'alfa': 'C%d' % issue,
+                    'market': 'XAMS', 'currency': 'EUR', 'type': 'AAN', 'quality': 'REALTIME',
+                    'lastPrice': last, 'lastTime': end.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'absDiff': 0.5, 'relDiff': 0.001, 'highPrice': last * 1.01, 'lowPrice': last * 0.99,
+                    'openPrice': last, 'closePrice': last, 'previousClosePrice': last - 0.5,
+                    'cumulativeVolume': 123456, 'windowStart': start.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'windowEnd': end.strftime('%Y-%m-%dT%H:%M:%S'),
+                }})
+            else:
+                price = last
+                data = []
+                for offset in range(points):
+                    price = round(price * (1 + rnd.gauss(0, 0.002)), 4)
+                    if parts[0] == 'ohlc':
+                        data.append([offset, price, round(price * 1.001, 4), round(price * 0.999, 4), price])
+                    else:
+                        data.append([offset, price])
+                series.append({'times': start.strftime('%Y-%m-%dT%H:%M:%S') + '/' + resolution,
+                               'expires': '2023-01-13T17:31:00+01:00', 'data': data, 'id': series_id, 'type': 'time'})
+        return {'requestid': query.get('requestid', ['1'])[0], 'start': start.strftime('%Y-%m-%dT%H:%M:%S'),
+                'end': end.strftime('%Y-%m-%dT%H:%M:%S'), 'resolution': resolution, 'series': series}
+
+    @staticmethod
+    def company_ratios(isin):
+        rnd = random.Random(isin)
+        return {'data': {'totalFloat': round(rnd.uniform(1e6, 1e9)), 'sharesOut': round(rnd.uniform(1e6, 1e9)),
+                         'consRecommendationTrend': {'buy': rnd.randint(0, 20), 'outperform': rnd.randint(0, 10),
+                                                     'hold': rnd.randint(0, 10), 'underperform': rnd.randint(0, 5),
+                                                     'sell': rnd.randint(0, 5)},
+                         'currentRatios': {'currency': 'EUR', 'ratiosGroups': [
+                             {'name': group, 'items': [{'id': f'{group}{n}', 'name': f'{group} ratio {n}', 'type': 'N',
+                                                        'value': str(round(rnd.uniform(-10, 100), 5))}
+                                                       for n in range(10)]}
+                             for group in ('Price and Volume', 'Income Statement', 'Per share data',
+                                           'Management Effectiveness', 'Valuation', 'Dividends')]}}}
+
+    @staticmethod
+    def company_profile(isin):
+        rnd = random.Random(isin)
+        return {'data': {'isin': isin, 'businessSummary': 'Mock company. ' * 40, 'sector': 'Technology',
+                         'industry': 'Software', 'employees': rnd.randint(10, 100000),
+                         'contacts': {'WEBSITE': 'https://example.com', 'ADDRESSLINE1': 'Mockstraat 1', 'CITY': 'Amsterdam'},
+                         'management': [{'name': f'Manager {n}', 'function': 'Director', 'since': '2015-01-01'}
+                                        for n in range(8)]}}
+
+    @staticmethod
+    def financials(isin):
+        rnd = random.Random(isin)
+        return {'data': {'currency': 'EUR', 'annual': [
+            {'fiscalYear': year, 'endDate': f'{year}-12-31', 'statements': [
+                {'type': kind, 'periodLength': 12, 'periodType': 'M',
+                 'items': [{'code': f'{kind}{n}', 'meaning': f'{kind} item {n}', 'value': round(rnd.uniform(-1e6, 1e7), 1)}
+                           for n in range(40)]}
+                for kind in ('INC', 'BAL', 'CAS')]}
+            for year in range(2015, 2023)]}}
+
+    def news(self, isin, offset, limit):
+        """News of isin, newest first; raise news_published to publish that many more. Every 10th story is shared."""
+        total = 100 + self.news_published
+        end = datetime(2023, 1, 13, 17, 30)
+        items = []
+        for n in range(offset, min(offset + limit, total)):
+            k = total - 1 - n
+            shared = k % 10 == 0
+            items.append({'id': f'story-{k}' if shared else f'{isin}-{k}', 'isins': [isin],
+                          'title': f'News {k}' if shared else f'News {k} about {isin}', 'brief': 'Mock news. ' * 10,
+                          'date': (end + timedelta(hours=k - 99)).strftime('%Y-%m-%dT%H:%M:%SZ'), 'language': 'en',
+                          'category': 'NEWS'})
+        return {'data': {'items': items, 'offset': offset, 'total': total}}
+
+    @staticmethod
+    def options(isin, offset, limit):
+        """The option chain of an underlying: 8 monthly expiries of 30 strikes, calls and puts."""
+        rnd = random.Random(isin)
+        underlying = rnd.uniform(20, 500)
+        step = 10 ** max(0, len(str(int(underlying))) - 2)
+        first = round(underlying / step) * step - 15 * step
+        chain = []
+        for month in range(2, 10):
+            expiry = date(2023, month, 15)
+            for n in range(30):
+                strike = float(first + n * step)
+                for side in ('C', 'P'):
+                    product_id = 90000000 + len(chain)
+                    chain.append({
+                        'id': str(product_id), 'name': f'{isin[2:6]} {side}{strike:.2f} {expiry:%d%b%y}'.upper(),
+                        'isin': 'NL%010d' % product_id, 'productType': 'OPTION', 'productTypeId': 8,
+                        'contractSize': 100.0, 'currency': 'EUR', 'tradable': True, 'strikePrice': strike,
+                        'expirationDate': f'{expiry.day}-{expiry.month}-{expiry.year}', 'putCall': side,
+                        'underlyingIsin': isin, 'closePrice': round(rnd.uniform(0.05, 50), 2),
+                    })
+        return chain[offset:offset + limit], len(chain)
+
+    def csv_report(self, kind, query):
+        """A transactions or account CSV report, as the text of the file."""
+        lines = ['Datum,Tijd,Product,ISIN,Omschrijving,Aantal,Koers,Waarde,Order Id']
+        for day in self.date_range(query):
+            for t in self.transactions_on(day):
+                created = parse_time(t['date'])
+                description = 'Koop' if t['quantity'] > 0 else 'Verkoop'
+                lines.append(f'{created:%d-%m-%Y},{created:%H:%M},"Company {t["productId"]}, NV",NL{t["productId"]:010d},'
+                             f'"{description} {abs(t["quantity"])} @ {t["price"]} EUR",{t["quantity"]},{t["price"]},'
+                             f'{t["total"]},{t["id"]}')
+        return '\r\n'.join(lines) + '\r\n'
+
+    def route(self, method, path, query, body):
+        """(status, response object, or str for a CSV file) for a request, or None when the path is unknown."""
+        path = path.split(';')[0]
+        if path in ('/login/secure/login', '/login/secure/login/totp'):
+            return 200, {'isPassCodeEnabled': False, 'locale': 'nl_NL', 'redirectUrl': 'https://trader.degiro.nl/trader/',
+                         'sessionId': self.session_id, 'status': 0, 'statusText': 'success'}
+        if path == '/pa/secure/client':
+            return 200, {'data': {'id': self.client_id, 'intAccount': self.account_id, 'username': 'mockuser',
+                                  'email': 'mock@example.com', 'firstContact': {'firstName': 'Mock', 'lastName': 'User'}}}
+        if path == '/login/secure/config':
+            return 200, {'data': {'clientId': self.client_id, 'sessionId': self.session_id}}
+        if path == '/trading/secure/logout':
+            return 200, None
+        if path.startswith('/trading/secure/v5/update/'):
+            return 200, self.update(query)
+        if path == '/product_search/secure/v5/products/info':
+            return 200, {'data': {str(i): self.product(i) for i in json.loads(body)
+                                  if str(i).isdigit() and 0 < int(i) <= self.products}}
+        if path == '/product_search/secure/v5/products/lookup':
+            limit = int(query.get('limit', ['1'])[0])
+            offset = int(query.get('offset', ['0'])[0])
+            return 200, {'offset': offset, 'products': [self.product(i) for i in range(offset + 1, offset + limit + 1)
+                                                        if i <= self.products]}
+        if path == '/products_s/secure/v5/stocks':
+            limit = int(query.get('limit', ['10'])[0])
+            offset = int(query.get('offset', ['0'])[0])
+            return 200, {'offset': offset, 'total': self.products,
+                         'products': [self.product(i) for i in range(offset + 1, min(offset + limit, self.products) + 1)]}
+        if path == '/reporting/secure/v4/order-history':
+            return 200, {'data': [order for day in self.date_range(query) for order in self.orders_on(day)]}
+        if path == '/reporting/secure/v4/transactions':
+            return 200, {'data': [t for day in self.date_range(query) for t in self.transactions_on(day)]}
+        if path == '/hchart/v1/deGiro/data.js':
+            return 200, self.chart(query)
+        if path in ('/reporting/secure/v3/transactionReport/csv', '/reporting/secure/v3/cashAccountReport/csv'):
+            return 200, self.csv_report(path.split('/')[-2], query)
+        if path.startswith('/dgtbxdsservice/company-ratios/'):
+            return 200, self.company_ratios(path.rsplit('/', 1)[1])
+        if path.startswith('/dgtbxdsservice/company-profile/v2/'):
+            return 200, self.company_profile(path.rsplit('/', 1)[1])
+        if path.startswith('/dgtbxdsservice/financial-statements/'):
+            return 200, self.financials(path.rsplit('/', 1)[1])
+        if path == '/product_search/secure/v5/options/':
+            products, total = self.options(query['underlyingIsin'][0], int(query.get('offset', ['0'])[0]),
+                                           int(query.get('limit', ['10'])[0]))
+            response = {'offset': int(query.get('offset', ['0'])[0]), 'products': products}
+            if query.get('requireTotal', ['false'])[0] == 'true':
+                response['total'] = total
+            return 200, response
+        if path == '/dgtbxdsservice/newsfeed/v2/news-by-company':
+            return 200, self.news(query['isin'][0], int(query.get('offset', ['0'])[0]), int(query.get('limit', ['10'])[0]))
+        return None
+
+    def handle(self, method, path, query, body):
+        """Counts the request, waits latency seconds and returns (status, response object)."""
+        with self.__lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.route(method, path, query, body) or (404, {'errors': [{'text': 'not found'}]})
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # send headers and body in one write, so Nagle and delayed ACKs don't add 40 ms to each response
+            wbufsize = 1 << 16
+
+            def log_message(self, *args):
+                pass
+
+            def handle_request(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('content-length') or 0)
+                body = self.rfile.read(length) if length else b''
+                status, payload = server.handle(self.command, parsed.path, parse_qs(parsed.query), body)
+                if isinstance(payload, str):
+                    content, content_type = b'\xef\xbb\xbf' + payload.encode(), 'text/csv;charset=UTF-8'
+                else:
+                    content = b'' if payload is None else json.dumps(payload).encode()
+                    content_type = 'application/json;charset=UTF-8'
+                etag = None
+                if status == 200 and self.command == 'GET':
+                    etag = '"%s"' % hashlib.md5(content).hexdigest()
+                    if self.headers.get('If-None-Match') == etag:
+                        status, content = 304, b''
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+        return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the mock DeGiro server in the foreground.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--products', type=int, default=5000)
+    args = parser.parse_args()
+    mock = MockDeGiroServer(latency=args.latency, products=args.products, port=args.port)
+    print(f'serving on {mock.url}')
+    mock.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
@@ -1,100 +1,165 @@
-from typing import Dict
-
-import requests, json
-from datetime import datetime, timedelta
-now = datetime.now
+import csv
 import getpass
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from degiroapi.order import Order
 from degiroapi.client_info import ClientInfo
+from degiroapi.product import Product
+from degiroapi.models import Position, OrderRecord, Transaction
 from degiroapi.datatypes import Data
 from degiroapi.intervaltypes import Interval
+from degiroapi.portfolio import DEFAULT_FIELDS
+from degiroapi.core import DeGiroCore, AuthorisationError, NoChangeError, BatchError, relogin_in_progress, now
+from degiroapi.transport import Transport, AsyncTransport
+from degiroapi.aio import AsyncDeGiro
+from degiroapi.cache import TTLCache
+from degiroapi.responsecache import ResponseCache
+from degiroapi.decoding import JSONDecoder, DecodeError
+from degiroapi.csvstream import CSVStitcher
+from degiroapi.orderbook import OrderBook
+from degiroapi.transactionstore import TransactionStore
+from degiroapi.pricestore import PriceStore
+from degiroapi.fx import FXRates
+from degiroapi.options import OptionChain
+from degiroapi.searchindex import ProductIndex
+from degiroapi.news import NewsTracker
+from degiroapi.ratelimit import RateLimiter
+from degiroapi.metrics import MetricsCollector
+
+class DeGiro(DeGiroCore):
+    max_workers = 8
+
+    def __init__(self, transport=None):
+        """transport: a degiroapi.Transport to tune connection pooling, timeouts and retries."""
+        super().__init__()
+        self.transport = transport or Transport()
+        self._relogin_lock = threading.Lock()
+
+    def _run(self, flow):
+        """Drives a DeGiroCore generator, performing each yielded request on the blocking session."""
+        try:
+            request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        response = self._request_many(request)
+                    else:
+                        response = self._request(request)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    request = flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+
+    def _request(self, request):
+        request, cached, background = self._cached(request)
+        if background is not None:
+            threading.Thread(target=self._revalidate, args=(background,), daemon=True).start()
+        if cached is not None:
+            return request.parse(200, cached.body, self.decoder)
+        session_id = self.session_id
+        try:
+            return self._send(request)
+        except AuthorisationError:
+            if self.credentials is None or relogin_in_progress.get():
+                raise
+            self._relogin(session_id)
+            if not request.idempotent:
+                raise
+            return self._send(request.renewed({session_id: self.session_id}))
+
+    def _send(self, request):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(request)
+        call = self._before(request)
+        try:
+            status_code, body = self.transport.send(request)
+        except Exception as e:
+            self._failed(call, e)
+            raise
+        return self._parse(call, request, status_code, body)
+
+    def _revalidate(self, request):
+        """Sends a conditional request for a stale response_cache entry; failures leave the entry as it is."""
+        try:
+            self._request(request)
+        except Exception:
+            pass
+        finally:
+            self.response_cache.end_revalidation(request.cached)
 
-session = requests.Session()
-session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'})
-
-class AuthorisationError(Exception):
-    pass
-
-class NoChangeError(Exception):
-    pass
-
-class DeGiro:
-    __LOGIN_URL = 'https://trader.degiro.nl/login/secure/login'
-    __LOGIN_TOTP_URL = 'https://trader.degiro.nl/login/secure/login/totp'
-    __CONFIG_URL = 'https://trader.degiro.nl/login/secure/config'
-
-    __LOGOUT_URL = 'https://trader.degiro.nl/trading/secure/logout'
-
-    __CLIENT_INFO_URL = 'https://trader.degiro.nl/pa/secure/client'
-
-    __GET_STOCKS_URL = 'https://trader.degiro.nl/products_s/secure/v5/stocks'
-    __PRODUCT_SEARCH_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/lookup'
-    __WARRANT_SEARCH_URL = 'https://trader.degiro.nl/product_search/secure/v5/warrants'
-    __PRODUCT_INFO_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/info'
-    __TRANSACTIONS_URL = 'https://trader.degiro.nl/reporting/secure/v4/transactions'
-    __ORDERS_URL = 'https://trader.degiro.nl/reporting/secure/v4/order-history'
-    __ACCOUNT_URL = 'https://trader.degiro.nl/reporting/secure/v6/accountoverview'
-    __DIVIDENDS_URL = 'https://trader.degiro.nl/reporting/secure/v3/ca/'
-
-    __PLACE_ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/checkOrder'
-    __ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/order/'
-
-    __DATA_URL = 'https://trader.degiro.nl/trading/secure/v5/update/'
-    __PRICE_DATA_URL = 'https://charting.vwdservices.com/hchart/v1/deGiro/data.js'
-
-    __COMPANY_RATIOS_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-ratios/'
-
-    __CSV_PORTFOLIO_URL = 'https://trader.degiro.nl/reporting/secure/v3/positionReport/csv'
-    __CSV_TRANSACTIONS_URL = 'https://trader.degiro.nl/reporting/secure/v3/transactionReport/csv'
-    __CSV_ACCOUNT_URL = 'https://trader.degiro.nl/reporting/secure/v3/cashAccountReport/csv'
-    __COMPANY_PROFILE_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-profile/v2/'
-    __FINANCIALS_URL= 'https://trader.degiro.nl/dgtbxdsservice/financial-statements/'
-    
-    __NEWS_URL = 'https://trader.degiro.nl/dgtbxdsservice/newsfeed/v2/news-by-company'
-    
-    __OPTION_TABLE_URL = "https://trader.degiro.nl/product_search/secure/v5/options/"
-    
-    __GET_REQUEST = 0
-    __POST_REQUEST = 1
-    __DELETE_REQUEST = 2
-    __PUT_REQUEST = 3
-
-    client_token = any
-    session_id = any
-    client_info = any
-    confirmation_id = any
-    
-    def logged(self): return type(self.session_id)==str
+    def _stream(self, request):
+        """
+        Yields the body of request in chunks as it arrives; an error status raises as in
+        Request.parse. An expired session is renewed as in _request (nothing was yielded yet).
+        """
+        session_id = self.session_id
+        try:
+            yield from self._send_stream(request)
+        except AuthorisationError:
+            if self.credentials is None or relogin_in_progress.get():
+                raise
+            self._relogin(session_id)
+            yield from self._send_stream(request.renewed({session_id: self.session_id}))
+
+    def _send_stream(self, request):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(request)
+        call = self._before(request)
+        received = 0
+        error_body = None
+        try:
+            with self.transport.stream(request) as (status_code, chunks):
+                if status_code != 200:
+                    error_body = b''.join(chunks)
+                else:
+                    for chunk in chunks:
+                        received += len(chunk)
+                        yield chunk
+        except Exception as e:
+            self._failed(call, e)
+            raise
+        if error_body is not None:
+            self._parse(call, request, status_code, error_body)
+        self._streamed(call, request, received)
+
+    def _relogin(self, expired_session_id):
+        """Logs in again with self.credentials, unless another thread already replaced the expired session."""
+        with self._relogin_lock:
+            if self.session_id != expired_session_id:
+                return
+            token = relogin_in_progress.set(True)
+            try:
+                self.login(**self.credentials())
+            finally:
+                relogin_in_progress.reset(token)
+
+    def _request_many(self, requests):
+        def request_or_error(request):
+            try:
+                return self._request(request)
+            except Exception as e:
+                return e
+        if len(requests) <= 1:
+            return [request_or_error(request) for request in requests]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(requests))) as executor:
+            return list(executor.map(request_or_error, requests))
+
+    @staticmethod
+    def _ordered_map(function, items, workers):
+        """Yields function(item) for every item in order, computing up to `workers` of them in parallel."""
+        if workers <= 1 or len(items) <= 1:
+            for item in items:
+                yield function(item)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(function, items)
 
     def login(self, username, password, totp=None):
-        login_payload = {
-            'username': username,
-            'password': password,
-            'isPassCodeReset': False,
-            'isRedirectToMobile': False
-        }
-        if totp:
-            login_payload["oneTimePassword"] = totp
-            url = DeGiro.__LOGIN_TOTP_URL
-        else:
-            url = DeGiro.__LOGIN_URL
-        login_response = self.__request(url, None, login_payload, request_type=DeGiro.__POST_REQUEST,
-                                        error_message='Could not login.')
-        self.session_id = login_response['sessionId']
-        client_info_payload = {'sessionId': self.session_id}
-        client_info_response = self.__request(DeGiro.__CLIENT_INFO_URL, None, client_info_payload,
-                                              error_message='Could not get client info.')
-        self.client_info = ClientInfo(client_info_response['data'])
-
-        cookie = {
-            'JSESSIONID': self.session_id
-        }
-
-        client_token_response = self.__request(DeGiro.__CONFIG_URL, cookie=cookie, request_type=DeGiro.__GET_REQUEST,
-                                               error_message='Could not get client config.')
-        self.client_token = client_token_response['data']['clientId']
-
-#         return client_info_response
+        return self._run(self._login(username, password, totp))
 
     def login_safe(self, auth2fa=False):
         totp = None
@@ -103,367 +168,141 @@ class DeGiro:
         return self.login(username=getpass.getpass("Degiro Username: "), password=getpass.getpass("Degiro Password: "), totp=totp)
 
     def logout(self):
-        logout_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-        self.__request(DeGiro.__LOGOUT_URL + ';jsessionid=' + self.session_id, None, logout_payload,
-                       error_message='Could not log out')
-        
-        self.session_id = any
-
-    @staticmethod
-    def __request(url, cookie=None, payload=None, headers=None, data=None, post_params=None, request_type=__GET_REQUEST,
-                  error_message='An error occurred.', return_raw_response=False)->Dict:
-
-        if request_type == DeGiro.__DELETE_REQUEST:
-            response = session.delete(url, json=payload)
-        elif request_type == DeGiro.__GET_REQUEST and cookie:
-            response = session.get(url, cookies=cookie)
-        elif request_type == DeGiro.__GET_REQUEST:
-            response = session.get(url, params=payload)
-        elif request_type == DeGiro.__POST_REQUEST and headers and data:
-            response = session.post(url, headers=headers, params=payload, data=data)
-        elif request_type == DeGiro.__POST_REQUEST and post_params:
-            response = session.post(url, params=post_params, json=payload)
-        elif request_type == DeGiro.__POST_REQUEST:
-            response = session.post(url, json=payload)
-        elif request_type == DeGiro.__PUT_REQUEST:
-            response = session.put(url, params=post_params, json=payload)
-        else:
-            raise Exception(f'Unknown request type: {request_type}')
-
-        if response.status_code == 200 or response.status_code == 201:
-            if return_raw_response:
-                return response.text
-            else:
-                try:
-                    return response.json()
-                except:
-                    return "No data"
-        elif response.status_code == 401:
-            raise AuthorisationError("Request not authorized. Session probably expired.")  
-        
-        else:
-            raise Exception(f'{error_message} Response: {response.text}')
+        return self._run(self._logout())
 
     def search_products(self, search_text, limit=1):
-        product_search_payload = {
-            'searchText': search_text,
-            'limit': limit,
-            'offset': 0,
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__PRODUCT_SEARCH_URL, None, product_search_payload,
-                              error_message='Could not get products.')['products']
-    
+        return self._run(self._search_products(search_text, limit))
+
     def search_warrants(self, search_text, limit=1):
-        warrant_search_payload = {
-            'searchText': search_text,
-            'limit': limit,
-            'offset': 0,
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__WARRANT_SEARCH_URL, None, warrant_search_payload,
-                              error_message='Could not get products.')['products']
-    
+        return self._run(self._search_warrants(search_text, limit))
+
     def option_table(self, isin, limit=1, offset=0, active=True):
-        option_table_payload = {
-            'underlyingIsin': isin,
-            'sortColumns': "expirationDate",
-            'requireTotal': 'false',
-            'sortTypes': "asc",
-            'offset': offset,
-            'limit': limit,
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        if active:
-            option_table_payload['strikeType']='active'
-            
-        print(option_table_payload)
-        return self.__request(DeGiro.__OPTION_TABLE_URL, None, option_table_payload,
-                              error_message='Could not get option table.')['products']
-    
-    
- 
+        return self._run(self._option_table(isin, limit, offset, active))
+
+    def option_chain(self, isin, active=True, page_size=500, workers=8):
+        """
+        All options on the underlying isin as an OptionChain, indexed by expiry, strike and
+        side. The first page tells how many there are; the other pages are fetched `workers`
+        at a time.
+        """
+        return self._run(self._option_chain(isin, active, page_size, workers))
+
+    def option_chains(self, isins, active=True, page_size=500, workers=8):
+        """
+        option_chain for many underlyings, keyed by isin; their first pages are fetched
+        together and the remaining pages of all of them share the `workers` slots.
+        Raises BatchError (with the chains that did load) if some underlyings failed.
+        """
+        return self._run(self._option_chains(isins, active, page_size, workers))
+
     def product_info(self, product_id):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__PRODUCT_INFO_URL, None, product_info_payload,
-                              headers={'content-type': 'application/json'},
-                              data=json.dumps([str(product_id)]),
-                              request_type=DeGiro.__POST_REQUEST,
-                              error_message='Could not get product info.')['data'][str(product_id)]
+        return self._run(self._product_info(product_id))
+
+    def product_infos(self, product_ids, batch_size=1000):
+        """
+        Product info for many products at once, keyed by product id (as first given, when the
+        same id comes both as int and str). The ids are sent in chunks of batch_size which are
+        fetched in parallel. Raises BatchError (with the partial results attached) if some
+        products could not be fetched.
+        """
+        return self._run(self._product_infos(product_ids, batch_size))
 
     def company_ratios(self, product_isin):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__COMPANY_RATIOS_URL + product_isin,
-                              None, product_info_payload,
-                              headers={'content-type': 'application/json'},
-                              data=None,
-                              request_type=DeGiro.__GET_REQUEST,
-                              error_message='Could not get company ratios.')['data']
+        return self._run(self._company_ratios(product_isin))
 
     def company_profile(self, product_isin):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__COMPANY_PROFILE_URL+product_isin,
-                              None, product_info_payload,
-                              headers={'content-type': 'application/json'},
-                              data=None,
-                              request_type=DeGiro.__GET_REQUEST,
-                              error_message='Could not get company profile.')['data']
-    
+        return self._run(self._company_profile(product_isin))
+
     def financials(self, product_isin):
-        product_info_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__FINANCIALS_URL+product_isin,
-                              None, product_info_payload,
-                              headers={'content-type': 'application/json'},
-                              data=None,
-                              request_type=DeGiro.__GET_REQUEST,
-                              error_message='Could not get financial statement.')['data']
-    
+        return self._run(self._financials(product_isin))
+
     def news(self, product_isin, offset=0, limit=10, language='en%2Cnl'):
-        news_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        url= DeGiro.__NEWS_URL + '?isin={0}&limit={1}&offset={2}&languages={3}'.format(product_isin, limit, offset, language)
-        return self.__request(url,
-#             DeGiro.__NEWS_URL,
-#                               +product_isin+"&",
-                              None, news_payload,
-                              headers={'content-type': 'application/json'},
-                              data=None,
-                              request_type=DeGiro.__GET_REQUEST,
-                              error_message='Could not get news.')['data']['items']
-    
-    
-#     isin=US0378331005&limit=10&offset=0&languages=en%2Cnl&intAccount=1307110&sessionId=00ABA2A3FC4FC7326866598D6C6F4051.prod_a_112_4
+        return self._run(self._news(product_isin, offset, limit, language))
+
+    def poll_news(self, tracker, isins, page_size=10, max_pages=10, workers=8, language='en%2Cnl'):
+        """
+        Yields the news items of isins that a NewsTracker has not seen before, ISIN by ISIN,
+        fetching up to `workers` ISINs in parallel. Per ISIN, pages are fetched only until one
+        reaches an item seen in an earlier poll (the first poll takes one page). A story about
+        several of the companies is yielded once.
+        """
+        isins = list(dict.fromkeys(isins))
+        for items in self._ordered_map(lambda isin: self._run(self._news_since(tracker, isin, page_size, max_pages,
+                                                                               language)), isins, workers):
+            yield from tracker.unseen(items)
+
+    def watch_news(self, tracker, isins, interval=60, page_size=10, max_pages=10, workers=8, language='en%2Cnl'):
+        """poll_news every `interval` seconds, forever: a stream of the news items as they appear."""
+        while True:
+            started = time.monotonic()
+            yield from self.poll_news(tracker, isins, page_size, max_pages, workers, language)
+            time.sleep(max(0, interval - (time.monotonic() - started)))
 
     def transactions(self, from_date=None, to_date=None, group_transactions=False):
-        if not from_date:
-            from_date=now().date()
-        if not to_date:
-            to_date=now().date()
-        transactions_payload = {
-            'fromDate': from_date.strftime('%d/%m/%Y'),
-            'toDate': to_date.strftime('%d/%m/%Y'),
-            'groupTransactionsByOrder': group_transactions,
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__TRANSACTIONS_URL, None, transactions_payload,
-                              error_message='Could not get transactions.')['data']
+        return self._run(self._transactions(from_date, to_date, group_transactions))
+
+    def sync_transactions(self, store, from_date=None, window_days=180, workers=4):
+        """
+        Brings a TransactionStore up to date: fetches the transactions from its synced_until
+        date (from_date on the first sync) until today, in windows of window_days of which
+        `workers` are fetched in parallel. Returns the number of new transactions.
+        """
+        return self._run(self._sync_transactions(store, from_date, window_days, workers))
 
     def future_dividends(self):
-        dividends_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__DIVIDENDS_URL + str(self.client_info.account_id), None, dividends_payload,
-                              error_message='Could not get future dividends.')['data']
+        return self._run(self._future_dividends())
 
     def account_overview(self, from_date=None, to_date=None):
-        if not from_date:
-            from_date=now().date()
-        if not to_date:
-            to_date=now().date()
-        account_payload = {
-            'fromDate': from_date.strftime('%d/%m/%Y'),
-            'toDate': to_date.strftime('%d/%m/%Y'),
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return self.__request(DeGiro.__ACCOUNT_URL, None, account_payload,
-                              error_message='Could not get account overview.')['data']
+        return self._run(self._account_overview(from_date, to_date))
 
     def orders(self, from_date=None, to_date=None, not_executed=None):
-        if not from_date:
-            from_date=now().date()
-        if not to_date:
-            to_date=now().date()
-        orders_payload = {
-            'fromDate': from_date.strftime('%d/%m/%Y'),
-            'toDate': to_date.strftime('%d/%m/%Y'),
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        # max 90 days
-        if (to_date - from_date).days > 90:
-            raise Exception('The maximum timespan is 90 days')
-        data = self.__request(DeGiro.__ORDERS_URL, None, orders_payload, error_message='Could not get orders.')['data']
-        data_not_executed = []
-        if not_executed:
-            for d in data:
-                if d['isActive']:
-                    data_not_executed.append(d)
-            return data_not_executed
-        else:
-            return data
+        return self._run(self._orders(from_date, to_date, not_executed))
+
+    def orders_range(self, from_date, to_date=None, not_executed=None, workers=4):
+        """
+        Yields the order history of any timespan in date order. The range is split into
+        windows of at most 90 days which are fetched `workers` at a time; orders seen in an
+        earlier window are not yielded again.
+        """
+        seen = set()
+        windows = self._date_windows(from_date, to_date)
+        for orders in self._ordered_map(lambda window: self.orders(window[0], window[1], not_executed), windows, workers):
+            yield from self._unseen_orders(orders, seen)
 
     def delete_order(self, orderId):
-        delete_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
+        return self._run(self._delete_order(orderId))
 
-        return self.__request(DeGiro.__ORDER_URL + orderId + ';jsessionid=' + self.session_id, None,
-                              delete_order_params,
-                              request_type=DeGiro.__DELETE_REQUEST,
-                              error_message='Could not delete order' + " " + orderId)
+    def refresh_order_book(self):
+        return self._run(self._refresh_order_book())
 
     def get_order(self, orderId):
-        from_date = (now() - timedelta(days=90)).date()  # max is 90 days
-        filtered_orders = [x for x in self.orders(from_date) if x['orderId'] == orderId]
-        if len(filtered_orders) == 1:
-            return filtered_orders[0]
-        elif len(filtered_orders) > 1:
-            return filtered_orders[-1]
-        else:
-            return None
-
+        return self._run(self._get_order(orderId))
 
     def modify_order(self, orderId, orderType=None, productId=None, timeType=None, size=None, limit=None, stop_loss=None):
-        check_dc = locals()
-        buysell_dc = {"S": "SELL", "B": "BUY"}
-        check_dc.pop("self")
-        check_dc.pop('orderId')
-        if all(v==None for v in check_dc.values()):
-            raise NoChangeError('This would change nothing to the order')
-        old = self.get_order(orderId)
-        if not old:
-            raise ValueError("Order not found")
-        assert old['isActive'], "This order is not active anymore"
-#         print(orderType, int(old['orderTypeId']))
-        order_payload = {
-            'buySell': buysell_dc[old['buysell']],
-            'productId': int(old['productId']),
-            'timeType': timeType or int(old['orderTimeTypeId']) ,
-            'size': size or old['size'],
-            'price': limit or old['price'],
-            'stopPrice': stop_loss or old['stopPrice']
-        }
-        if orderType != None:
-            order_payload['orderType'] = orderType
-        else:
-            order_payload['orderType'] = int(old['orderTypeId'])
-        old_order_payload = {
-            'buySell': buysell_dc[old['buysell']],
-            'orderType': int(old['orderTypeId']) ,
-            'productId': int(old['productId']),
-            'timeType': int(old['orderTimeTypeId']) ,
-            'size':  old['size'],
-            'price':  old['price'],
-            'stopPrice': old['stopPrice']
-        }
-#         print(order_payload, old_order_payload)
-        if order_payload == old_order_payload:
-            raise NoChangeError('This would change nothing to the order')
-        modify_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-#         if orderType == Order.Type.LIMIT:
-#             order_payload = {
-#                 'buySell': buySell,
-#                 'orderType': Order.Type.LIMIT,
-#                 'productId': productId,
-#                 'timeType': timeType,
-#                 'size': size,
-#                 'price': limit
-#             }
-#         elif orderType == Order.Type.STOPLOSS:
-#             order_payload = {
-#                 'buySell': buySell,
-#                 'orderType': Order.Type.STOPLOSS,
-#                 'productId': productId,
-#                 'timeType': timeType,
-#                 'size': size,
-#                 'stopPrice': limit
-# #                 'stopPrice': stop_loss
-#             }
-
-        return self.__request(DeGiro.__ORDER_URL + orderId + ';jsessionid=' + self.session_id, None,
-                              order_payload, request_type=DeGiro.__PUT_REQUEST,
-                              error_message='Could not modify order' + " " + orderId)
+        return self._run(self._modify_order(orderId, orderType, productId, timeType, size, limit, stop_loss))
 
+    def sync(self, datatypes=None):
+        """
+        Fetches only what changed since the previous sync (everything on the first call) and
+        merges it into self.account_state. Returns the Change events of this sync, which are
+        also passed to the callbacks registered with account_state.subscribe(). By default
+        Data.Type.PORTFOLIO, CASHFUNDS, ORDERS and TOTALPORTFOLIO are synced; pass datatypes
+        on the first call to sync fewer.
+        """
+        return self._run(self._sync(datatypes))
 
-    @staticmethod
-    def filtercashfunds(cashfunds):
-        data = []
-        for item in cashfunds['cashFunds']['value']:
-            if item['value'][2]['value'] != 0:
-                data.append(item['value'][1]['value'] + " " + str(item['value'][2]['value']))
-        return data
+    def getdata(self, datatype, filter_zero=None, incremental=False, fields=DEFAULT_FIELDS, columnar=False):
+        """
+        For Data.Type.PORTFOLIO, fields selects the position fields to return (None for all of
+        them) and columnar=True / 'numpy' returns a dict of lists / NumPy arrays instead of rows.
+        """
+        return self._run(self._getdata(datatype, filter_zero, incremental, fields, columnar))
 
-    @staticmethod
-    def filterportfolio(portfolio, filter_zero=None):
-        data = []
-        data_non_zero = []
-        for item in portfolio['portfolio']['value']:
-            positionType = size = price = value = breakEvenPrice = None
-            for i in item['value']:
-                size = i['value'] if i['name'] == 'size' else size
-                positionType = i['value'] if i['name'] == 'positionType' else positionType
-                price = i['value'] if i['name'] == 'price' else price
-                value = i['value'] if i['name'] == 'value' else value
-                breakEvenPrice = i['value'] if i['name'] == 'breakEvenPrice' else breakEvenPrice
-            data.append({
-                "id": item['id'],
-                "positionType": positionType,
-                "size": size,
-                "price": price,
-                "value": value,
-                "breakEvenPrice": breakEvenPrice
-            })
-        if filter_zero:
-            for d in data:
-                if d['size'] != 0.0:
-                    data_non_zero.append(d)
-            return data_non_zero
-        else:
-            return data
-
-    def getdata(self, datatype, filter_zero=None):
-        data_payload = {
-            datatype: 0
-        }
-
-        if datatype == Data.Type.CASHFUNDS:
-            return self.filtercashfunds(
-                self.__request(DeGiro.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id,
-                               None,
-                               data_payload,
-                               error_message='Could not get data'))
-        elif datatype == Data.Type.PORTFOLIO:
-            return self.filterportfolio(
-                self.__request(DeGiro.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id,
-                               None,
-                               data_payload,
-                               error_message='Could not get data'), filter_zero)
-        else:
-            return self.__request(
-                DeGiro.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id, None,
-                data_payload,
-                error_message='Could not get data')
-
-    def real_time_price(self, product_id, interval, resolution='PT1M', _type='price'):
+    def real_time_price(self, product_id, interval, resolution='PT1M', _type='price', arrays=False):
         """
         price can also be 'ohlc'
+        arrays=True returns the time series as NumPy arrays instead: 'time' (datetime64) and
+        'price', or 'open', 'high', 'low' and 'close' (float64).
         interval =
             One_Day = 'P1D',
             One_Week = 'P1W',
@@ -475,203 +314,120 @@ class DeGiro:
             Five_Years = 'P5Y',
             Max = 'P50Y'
         """
-        product_info = self.product_info(product_id)
+        return self._run(self._real_time_price(product_id, interval, resolution, _type, arrays))
 
-        vw_id = product_info['vwdId']
-        vw_id_type = product_info['vwdIdentifierType']
-        try:
-            price_payload = {
-                'requestid': 1,
-                'resolution': resolution,
-                'period': interval,
-
-                'series': [vw_id_type + ':' + vw_id, 'price:' + vw_id_type + ':' + vw_id],
-                'userToken': self.client_token
-            }
-        except:
-            # will never get here, check later whether it's needed at all
-            try:
-                vw_id = self.product_info(product_id)['vwdIdSecondary']
-                price_payload = {
-                'requestid': 1,
-                'resolution': resolution,
-                'period': interval,
-
-                'series': ['issueid:' + vw_id, _type+':issueid:' + vw_id],
-                'userToken': self.client_token
-                }
-            except:
-                vwdId = self.product_info(product_id)['vwdId']
-                price_payload = {
-                'requestid': 1,
-                'resolution': resolution,
-                'period': interval,
-
-                'series': ['vwdkey:' + vwdId, _type+':vwdkey:' + vwdId],
-                'userToken': self.client_token
-                }
-
-        return self.__request(DeGiro.__PRICE_DATA_URL, None, price_payload,
-                              error_message='Could not get real time price')['series']
+    def real_time_prices(self, product_ids, interval, resolution='PT1M', _type='price', batch_size=50, arrays=False,
+                         align=None):
+        """
+        real_time_price for many products at once, keyed by product id. The vwd identifiers are
+        resolved once and remembered, and up to batch_size products are packed in one chart
+        request. Raises BatchError (with the partial results attached) if some products failed.
+        align='outer' or 'inner' returns (times, {product id: float64 prices}) on one time index
+        instead (the close for ohlc), with NaN where a product has no value.
+        """
+        return self._run(self._real_time_prices(product_ids, interval, resolution, _type, batch_size, arrays, align))
 
     def buyorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
-        place_buy_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-        place_buy_order_payload = {
-            'buySell': "BUY",
-            'orderType': orderType,
-            'productId': productId,
-            'timeType': timeType,
-            'size': size,
-            'price': limit,
-            'stopPrice': stop_loss,
-        }
-        if orderType != Order.Type.STOPLIMIT and orderType != Order.Type.MARKET \
-                and orderType != Order.Type.LIMIT and orderType != Order.Type.STOPLOSS:
-            raise Exception('Invalid order type')
-
-        if timeType != Order.Time.DAY and timeType != Order.Time.GTC:
-            raise Exception('Invalid time type')
-
-        place_check_order_response = self.__request(DeGiro.__PLACE_ORDER_URL + ';jsessionid=' + self.session_id, None,
-                                                    place_buy_order_payload, place_buy_order_params,
-                                                    request_type=DeGiro.__POST_REQUEST,
-                                                    error_message='Could not place order')
-
-        self.confirmation_id = place_check_order_response['data']['confirmationId']
-
-        resp = self.__request(DeGiro.__ORDER_URL + self.confirmation_id + ';jsessionid=' + self.session_id, None,
-                       place_buy_order_payload, place_buy_order_params,
-                       request_type=DeGiro.__POST_REQUEST,
-                       error_message='Could not confirm order')
-        return resp
+        return self._run(self._buyorder(orderType, productId, timeType, size, limit, stop_loss))
 
     def sellorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
-        place_sell_order_params = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-        }
-        place_sell_order_payload = {
-            'buySell': "SELL",
-            'orderType': orderType,
-            'productId': productId,
-            'timeType': timeType,
-            'size': size,
-            'price': limit,
-            'stopPrice': stop_loss,
-        }
-        if orderType != Order.Type.STOPLIMIT and orderType != Order.Type.MARKET \
-                and orderType != Order.Type.LIMIT and orderType != Order.Type.STOPLOSS:
-            raise Exception('Invalid order type')
-
-        if timeType != Order.Time.DAY and timeType != Order.Time.GTC:
-            raise Exception('Invalid time type')
-
-        place_check_order_response = self.__request(DeGiro.__PLACE_ORDER_URL + ';jsessionid=' + self.session_id, None,
-                                                    place_sell_order_payload, place_sell_order_params,
-                                                    request_type=DeGiro.__POST_REQUEST,
-                                                    error_message='Could not place order')
-
-        self.confirmation_id = place_check_order_response['data']['confirmationId']
-
-        resp = self.__request(DeGiro.__ORDER_URL + self.confirmation_id + ';jsessionid=' + self.session_id, None,
-                       place_sell_order_payload, place_sell_order_params,
-                       request_type=DeGiro.__POST_REQUEST,
-                       error_message='Could not confirm order')
-        return resp
+        return self._run(self._sellorder(orderType, productId, timeType, size, limit, stop_loss))
+
+    def price_history(self, store, product_id, interval, resolution='PT1M', _type='price'):
+        """
+        real_time_price(arrays=True) through a PriceStore: only the bars since the last call
+        (or all of interval, if the store does not reach back that far) are downloaded and
+        merged into the store, which then returns the history of the last interval.
+        """
+        return self._run(self._price_history(store, product_id, interval, resolution, _type))
+
+    def price_histories(self, store, product_ids, interval, resolution='PT1M', _type='price', batch_size=50,
+                        align=None):
+        """
+        price_history for many products, keyed by product id; the products that need the same
+        period are fetched in batches like real_time_prices, and align works the same way.
+        """
+        return self._run(self._price_histories(store, product_ids, interval, resolution, _type, batch_size, align))
 
     def get_stock_list(self, indexId, stockCountryId, offset=0):
-        stock_list_params = {
-            'indexId': indexId,
-            'stockCountryId': stockCountryId,
-            'offset': offset,
-            'limit': None,
-            'requireTotal': "true",
-            'sortColumns': "name",
-            'sortTypes': "asc",
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-        return \
-            self.__request(DeGiro.__GET_STOCKS_URL, None, stock_list_params, error_message='Could not get stock list')[
-                'products']
+        return self._run(self._get_stock_list(indexId, stockCountryId, offset))
 
     def download_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl'):
-        if csv_type.upper() not in ('ACCOUNT', 'PORTFOLIO', 'TRANSACTIONS'):
-            raise Exception("csv_type should be one of ('ACCOUNT', 'PORTFOLIO', 'TRANSACTIONS')")
-        if csv_type.upper() in ('PORTFOLIO', 'TRANSACTIONS') and from_date is None:
-            raise Exception("from_date is required for csv_type %s" % csv_type.upper())
-        if to_date is None:
-            to_date = datetime.now()
-        csv_payload = {
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id,
-            'fromDate': from_date.strftime('%d/%m/%Y'),
-            'toDate': to_date.strftime('%d/%m/%Y'),
-            'country': country,
-            'lang': lang
-        }
-        url = None
-        if csv_type.upper() == 'ACCOUNT':
-            url = DeGiro.__CSV_ACCOUNT_URL
-        if csv_type.upper() == 'PORTFOLIO':
-            url = DeGiro.__CSV_PORTFOLIO_URL
-        if csv_type.upper() == 'TRANSACTIONS':
-            url = DeGiro.__CSV_TRANSACTIONS_URL
-        return self.__request(url, None, csv_payload, error_message='Could not get csv', return_raw_response=True)
+        return self._run(self._download_csv(csv_type, from_date, to_date, country, lang))
+
+    def stream_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl', chunk_days=None, workers=4):
+        """
+        Yields a CSV report record by record (a line, unless a quoted field spans lines) while
+        it downloads. With chunk_days the date range is split into reports of at most that
+        many days, fetched `workers` at a time and joined in date order with one header.
+        """
+        requests = self._csv_requests(csv_type, from_date, to_date, country, lang, chunk_days)
+        stitcher = CSVStitcher()
+        if len(requests) == 1:
+            for chunk in self._stream(requests[0]):
+                yield from stitcher.feed(chunk, requests[0].encoding)
+            yield from stitcher.finish()
+            return
+        for text in self._ordered_map(self._request, requests, workers):
+            stitcher.start()
+            yield from stitcher.feed(text)
+            yield from stitcher.finish()
+
+    def iter_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl', chunk_days=None, workers=4):
+        """stream_csv parsed into rows (lists of str), the header row first."""
+        yield from csv.reader(self.stream_csv(csv_type, from_date, to_date, country, lang, chunk_days, workers))
+
+    def download_csv_to(self, file, csv_type, from_date=None, to_date=None, country='NL', lang='nl', chunk_days=None,
+                        workers=4):
+        """Writes a CSV report to file (a path or a text file) as it downloads. Returns the number of records written."""
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'w', newline='', encoding='utf-8') as f:
+                return self.download_csv_to(f, csv_type, from_date, to_date, country, lang, chunk_days, workers)
+        records = 0
+        for record in self.stream_csv(csv_type, from_date, to_date, country, lang, chunk_days, workers):
+            file.write(record)
+            records += 1
+        return records
 
     def get_exchange_rate(self, exchange):
         '''Provides real time exchange rates for the most common currencies.
         Args:
-            exchange (str): One of the following: 'EUR/USD', 'EUR/GBP', 'EUR/CHF', 'EUR/CHF', 'EUR/JPY', 'GBP/USD'.
+            exchange (str): One of the following: 'EUR/USD', 'EUR/GBP', 'EUR/CHF', 'EUR/JPY', 'GBP/USD',
+                or a cross of those currencies such as 'USD/CHF' (see fx_rates). The quotes are
+                always fetched anew; use exchange_rates to reuse them for fx_rates.max_age seconds.
         '''
-        exchange_ids = {'EUR/USD': '705366',
-                        'EUR/GBP': '714324',
-                        'EUR/CHF': '714322',
-                        'EUR/JPY': '1316472', 
-                        'GBP/USD': '1788982'
-                        }
-        last_rate = self.real_time_price(exchange_ids[exchange], interval=Interval.Type.One_Day)[0]['data']['lastPrice']
-        return last_rate
-
-    def get_stock_list_by_country(self, stockCountryId, limit = None):
-        
-        products = []
-
-        stock_list_params = {
-            'stockCountryId': stockCountryId,
-            'offset': 0,
-            'isInUSGreenList': "false",
-            'limit': 10,
-            'requireTotal': "true",
-            'sortColumns': "name",
-            'sortTypes': "asc",
-            'intAccount': self.client_info.account_id,
-            'sessionId': self.session_id
-        }
-
-        total = self.__request(DeGiro.__GET_STOCKS_URL, None, stock_list_params, error_message='Could not get stock list')['total']
-        #print(str(total))
-
-        dif = round(total / 1000, 0) +1
-        #print(str(dif))
-
-        for x in range(int(dif)):
-            stock_list_params['limit'] = 1000
-            stock_list_params['offset'] = x*1000
-            #print(stock_list_params)
-
-            prods = self.__request(DeGiro.__GET_STOCKS_URL, None, stock_list_params, error_message='Could not get stock list')[
-                'products']
-
-            for prod in prods:
-                products.append(prod)
-
-            if limit != None:
-                if (len(products)>limit):
-                    return products
-            #print(len(products))
-
-        return products
+        return self._run(self._get_exchange_rate(exchange))
+
+    def exchange_rates(self, currencies, to='EUR'):
+        """
+        {currency: how much `to` one unit of it buys} for several currencies. The quotes that
+        are missing or older than fx_rates.max_age are fetched in one chart request, cross
+        rates are derived from the quotes against EUR.
+        """
+        return self._run(self._exchange_rates(currencies, to))
+
+    def convert(self, amounts, currencies, to='EUR'):
+        """
+        amounts in currencies (one code, or one per amount) converted to `to` as a NumPy
+        array, fetching the quotes like exchange_rates.
+        """
+        return self._run(self._convert(amounts, currencies, to))
+
+    def get_stock_list_by_country(self, stockCountryId, limit = None, page_size=1000, workers=1):
+        """
+        All stocks of a country. Once the first page has told the total, the remaining
+        pages are fetched `workers` at a time.
+        """
+        return self._run(self._get_stock_list_by_country(stockCountryId, limit, page_size, workers))
+
+    def iter_stocks(self, stockCountryId, page_size=1000, workers=1):
+        """
+        Yields the stocks of a country page by page, in order, as the pages arrive. With
+        workers > 1 the pages after the first are fetched in parallel by that many threads.
+        """
+        first_page = self._run(self._stock_list_page(stockCountryId, 0, page_size))
+        yield from first_page['products']
+        offsets = self._page_offsets(first_page['total'], page_size)
+        for page in self._ordered_map(lambda offset: self._run(self._stock_list_page(stockCountryId, offset, page_size)),
+                                      offsets, workers):
+            yield from page['products']
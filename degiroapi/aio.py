@@ -0,0 +1,355 @@
+import asyncio
+import csv
+import getpass
+import os
+from degiroapi.portfolio import DEFAULT_FIELDS
+from degiroapi.core import DeGiroCore, AuthorisationError, relogin_in_progress
+from degiroapi.transport import AsyncTransport
+from degiroapi.csvstream import CSVStitcher
+
+
+class AsyncDeGiro(DeGiroCore):
+    """
+    asyncio twin of ``DeGiro``: same methods, same payloads, but every call is a coroutine
+    so many of them can run concurrently on one event loop.
+
+    Requires aiohttp (``pip install degiroapi[async]``). Use it as an async context
+    manager, or call ``close()`` when done.
+    """
+
+    def __init__(self, transport=None):
+        """transport: a degiroapi.AsyncTransport to tune connection pooling, timeouts and retries."""
+        super().__init__()
+        self.transport = transport or AsyncTransport()
+        self._relogin_lock = None
+        # response_cache revalidations running in the background
+        self._background = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        for task in self._background:
+            task.cancel()
+        await self.transport.close()
+
+    async def _run(self, flow):
+        """Drives a DeGiroCore generator, awaiting each yielded request on the aiohttp session."""
+        try:
+            request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        response = await asyncio.gather(*(self._request(r) for r in request), return_exceptions=True)
+                    else:
+                        response = await self._request(request)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    request = flow.send(response)
+        except StopIteration as stop:
+            return stop.value
+
+    async def _request(self, request):
+        request, cached, background = self._cached(request)
+        if background is not None:
+            task = asyncio.ensure_future(self._revalidate(background))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        if cached is not None:
+            return request.parse(200, cached.body, self.decoder)
+        session_id = self.session_id
+        try:
+            return await self._send(request)
+        except AuthorisationError:
+            if self.credentials is None or relogin_in_progress.get():
+                raise
+            await self._relogin(session_id)
+            if not request.idempotent:
+                raise
+            return await self._send(request.renewed({session_id: self.session_id}))
+
+    async def _send(self, request):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(request)
+        call = self._before(request)
+        try:
+            status_code, body = await self.transport.send(request)
+        except Exception as e:
+            self._failed(call, e)
+            raise
+        return self._parse(call, request, status_code, body)
+
+    async def _revalidate(self, request):
+        """Sends a conditional request for a stale response_cache entry; failures leave the entry as it is."""
+        try:
+            await self._request(request)
+        except Exception:
+            pass
+        finally:
+            self.response_cache.end_revalidation(request.cached)
+
+    async def _stream(self, request):
+        """
+        Yields the body of request in chunks as it arrives; an error status raises as in
+        Request.parse. An expired session is renewed as in _request (nothing was yielded yet).
+        """
+        session_id = self.session_id
+        try:
+            async for chunk in self._send_stream(request):
+                yield chunk
+        except AuthorisationError:
+            if self.credentials is None or relogin_in_progress.get():
+                raise
+            await self._relogin(session_id)
+            async for chunk in self._send_stream(request.renewed({session_id: self.session_id})):
+                yield chunk
+
+    async def _send_stream(self, request):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(request)
+        call = self._before(request)
+        received = 0
+        error_body = None
+        try:
+            async with self.transport.stream(request) as (status_code, chunks):
+                if status_code != 200:
+                    error_body = b''.join([chunk async for chunk in chunks])
+                else:
+                    async for chunk in chunks:
+                        received += len(chunk)
+                        yield chunk
+        except Exception as e:
+            self._failed(call, e)
+            raise
+        if error_body is not None:
+            self._parse(call, request, status_code, error_body)
+        self._streamed(call, request, received)
+
+    async def _relogin(self, expired_session_id):
+        """Logs in again with self.credentials, unless another task already replaced the expired session."""
+        if self._relogin_lock is None:
+            self._relogin_lock = asyncio.Lock()
+        async with self._relogin_lock:
+            if self.session_id != expired_session_id:
+                return
+            token = relogin_in_progress.set(True)
+            try:
+                await self.login(**self.credentials())
+            finally:
+                relogin_in_progress.reset(token)
+
+    @staticmethod
+    async def _ordered_map(function, items, workers):
+        """Yields await function(item) for every item in order, with at most `workers` of them in flight."""
+        semaphore = asyncio.Semaphore(max(workers, 1))
+
+        async def limited(item):
+            async with semaphore:
+                return await function(item)
+
+        tasks = [asyncio.ensure_future(limited(item)) for item in items]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def login(self, username, password, totp=None):
+        return await self._run(self._login(username, password, totp))
+
+    async def login_safe(self, auth2fa=False):
+        totp = None
+        if auth2fa:
+            totp = getpass.getpass(prompt='TOPT: ')
+        return await self.login(username=getpass.getpass("Degiro Username: "), password=getpass.getpass("Degiro Password: "), totp=totp)
+
+    async def logout(self):
+        return await self._run(self._logout())
+
+    async def search_products(self, search_text, limit=1):
+        return await self._run(self._search_products(search_text, limit))
+
+    async def search_warrants(self, search_text, limit=1):
+        return await self._run(self._search_warrants(search_text, limit))
+
+    async def option_table(self, isin, limit=1, offset=0, active=True):
+        return await self._run(self._option_table(isin, limit, offset, active))
+
+    async def option_chain(self, isin, active=True, page_size=500, workers=8):
+        return await self._run(self._option_chain(isin, active, page_size, workers))
+
+    async def option_chains(self, isins, active=True, page_size=500, workers=8):
+        return await self._run(self._option_chains(isins, active, page_size, workers))
+
+    async def product_info(self, product_id):
+        return await self._run(self._product_info(product_id))
+
+    async def product_infos(self, product_ids, batch_size=1000):
+        return await self._run(self._product_infos(product_ids, batch_size))
+
+    async def company_ratios(self, product_isin):
+        return await self._run(self._company_ratios(product_isin))
+
+    async def company_profile(self, product_isin):
+        return await self._run(self._company_profile(product_isin))
+
+    async def financials(self, product_isin):
+        return await self._run(self._financials(product_isin))
+
+    async def news(self, product_isin, offset=0, limit=10, language='en%2Cnl'):
+        return await self._run(self._news(product_isin, offset, limit, language))
+
+    async def poll_news(self, tracker, isins, page_size=10, max_pages=10, workers=8, language='en%2Cnl'):
+        """Async generator twin of DeGiro.poll_news; at most `workers` ISINs are in flight at once."""
+        isins = list(dict.fromkeys(isins))
+        async for items in self._ordered_map(lambda isin: self._run(self._news_since(tracker, isin, page_size, max_pages,
+                                                                                     language)), isins, workers):
+            for item in tracker.unseen(items):
+                yield item
+
+    async def watch_news(self, tracker, isins, interval=60, page_size=10, max_pages=10, workers=8,
+                         language='en%2Cnl'):
+        """Async generator twin of DeGiro.watch_news."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            async for item in self.poll_news(tracker, isins, page_size, max_pages, workers, language):
+                yield item
+            await asyncio.sleep(max(0, interval - (loop.time() - started)))
+
+    async def transactions(self, from_date=None, to_date=None, group_transactions=False):
+        return await self._run(self._transactions(from_date, to_date, group_transactions))
+
+    async def sync_transactions(self, store, from_date=None, window_days=180, workers=4):
+        return await self._run(self._sync_transactions(store, from_date, window_days, workers))
+
+    async def future_dividends(self):
+        return await self._run(self._future_dividends())
+
+    async def account_overview(self, from_date=None, to_date=None):
+        return await self._run(self._account_overview(from_date, to_date))
+
+    async def orders(self, from_date=None, to_date=None, not_executed=None):
+        return await self._run(self._orders(from_date, to_date, not_executed))
+
+    async def orders_range(self, from_date, to_date=None, not_executed=None, workers=4):
+        """Async generator twin of DeGiro.orders_range."""
+        seen = set()
+        windows = self._date_windows(from_date, to_date)
+        async for orders in self._ordered_map(lambda window: self.orders(window[0], window[1], not_executed), windows, workers):
+            for order in self._unseen_orders(orders, seen):
+                yield order
+
+    async def delete_order(self, orderId):
+        return await self._run(self._delete_order(orderId))
+
+    async def refresh_order_book(self):
+        return await self._run(self._refresh_order_book())
+
+    async def get_order(self, orderId):
+        return await self._run(self._get_order(orderId))
+
+    async def modify_order(self, orderId, orderType=None, productId=None, timeType=None, size=None, limit=None, stop_loss=None):
+        return await self._run(self._modify_order(orderId, orderType, productId, timeType, size, limit, stop_loss))
+
+    async def sync(self, datatypes=None):
+        return await self._run(self._sync(datatypes))
+
+    async def getdata(self, datatype, filter_zero=None, incremental=False, fields=DEFAULT_FIELDS, columnar=False):
+        return await self._run(self._getdata(datatype, filter_zero, incremental, fields, columnar))
+
+    async def real_time_price(self, product_id, interval, resolution='PT1M', _type='price', arrays=False):
+        return await self._run(self._real_time_price(product_id, interval, resolution, _type, arrays))
+
+    async def real_time_prices(self, product_ids, interval, resolution='PT1M', _type='price', batch_size=50,
+                               arrays=False, align=None):
+        return await self._run(self._real_time_prices(product_ids, interval, resolution, _type, batch_size, arrays,
+                                                      align))
+
+    async def buyorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        return await self._run(self._buyorder(orderType, productId, timeType, size, limit, stop_loss))
+
+    async def sellorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        return await self._run(self._sellorder(orderType, productId, timeType, size, limit, stop_loss))
+
+    async def price_history(self, store, product_id, interval, resolution='PT1M', _type='price'):
+        return await self._run(self._price_history(store, product_id, interval, resolution, _type))
+
+    async def price_histories(self, store, product_ids, interval, resolution='PT1M', _type='price', batch_size=50,
+                              align=None):
+        return await self._run(self._price_histories(store, product_ids, interval, resolution, _type, batch_size,
+                                                     align))
+
+    async def get_stock_list(self, indexId, stockCountryId, offset=0):
+        return await self._run(self._get_stock_list(indexId, stockCountryId, offset))
+
+    async def download_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl'):
+        return await self._run(self._download_csv(csv_type, from_date, to_date, country, lang))
+
+    async def stream_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl', chunk_days=None,
+                         workers=4):
+        """
+        Yields a CSV report record by record (a line, unless a quoted field spans lines) while
+        it downloads. With chunk_days the date range is split into reports of at most that
+        many days, fetched `workers` at a time and joined in date order with one header.
+        """
+        requests = self._csv_requests(csv_type, from_date, to_date, country, lang, chunk_days)
+        stitcher = CSVStitcher()
+        if len(requests) == 1:
+            async for chunk in self._stream(requests[0]):
+                for record in stitcher.feed(chunk, requests[0].encoding):
+                    yield record
+            for record in stitcher.finish():
+                yield record
+            return
+        async for text in self._ordered_map(self._request, requests, workers):
+            stitcher.start()
+            for record in stitcher.feed(text) + stitcher.finish():
+                yield record
+
+    async def iter_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl', chunk_days=None,
+                       workers=4):
+        """stream_csv parsed into rows (lists of str), the header row first."""
+        async for record in self.stream_csv(csv_type, from_date, to_date, country, lang, chunk_days, workers):
+            for row in csv.reader([record]):
+                yield row
+
+    async def download_csv_to(self, file, csv_type, from_date=None, to_date=None, country='NL', lang='nl',
+                              chunk_days=None, workers=4):
+        """Writes a CSV report to file (a path or a text file) as it downloads. Returns the number of records written."""
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'w', newline='', encoding='utf-8') as f:
+                return await self.download_csv_to(f, csv_type, from_date, to_date, country, lang, chunk_days, workers)
+        records = 0
+        async for record in self.stream_csv(csv_type, from_date, to_date, country, lang, chunk_days, workers):
+            file.write(record)
+            records += 1
+        return records
+
+    async def get_exchange_rate(self, exchange):
+        return await self._run(self._get_exchange_rate(exchange))
+
+    async def exchange_rates(self, currencies, to='EUR'):
+        return await self._run(self._exchange_rates(currencies, to))
+
+    async def convert(self, amounts, currencies, to='EUR'):
+        return await self._run(self._convert(amounts, currencies, to))
+
+    async def get_stock_list_by_country(self, stockCountryId, limit = None, page_size=1000, workers=1):
+        return await self._run(self._get_stock_list_by_country(stockCountryId, limit, page_size, workers))
+
+    async def iter_stocks(self, stockCountryId, page_size=1000, workers=1):
+        """Async generator twin of DeGiro.iter_stocks; at most `workers` pages are in flight at once."""
+        first_page = await self._run(self._stock_list_page(stockCountryId, 0, page_size))
+        for product in first_page['products']:
+            yield product
+        offsets = self._page_offsets(first_page['total'], page_size)
+        async for page in self._ordered_map(lambda offset: self._run(self._stock_list_page(stockCountryId, offset, page_size)),
+                                            offsets, workers):
+            for product in page['products']:
+                yield product
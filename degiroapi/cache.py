@@ -0,0 +1,102 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    In-memory LRU cache whose entries expire after ``ttl`` seconds.
+
+    When ``path`` is given the entries are also written to an SQLite database, so
+    they survive restarts: the unexpired ones are loaded when the cache is opened, and
+    evicted or expired entries are deleted from the file as well, so it holds what the
+    cache holds. Values must be JSON serialisable when a path is used. ``hits`` and
+    ``misses`` count the lookups served from the cache and the ones that were not.
+    """
+
+    def __init__(self, maxsize=10000, ttl=24 * 60 * 60, path=None, table='cache'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__table = table
+        self.__db = None
+        if path is not None:
+            self.__db = sqlite3.connect(path, check_same_thread=False)
+            self.__db.execute(f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT, stored REAL)')
+            if ttl is not None:
+                self.__db.execute(f'DELETE FROM {table} WHERE stored < ?', (time.time() - ttl,))
+            rows = self.__db.execute(f'SELECT key, value, stored FROM {table} ORDER BY stored').fetchall()
+            for key, value, stored in rows:
+                self.__remember(key, (json.loads(value), stored))
+            self.__db.commit()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        with self.__lock:
+            return self.__lookup(key) is not None
+
+    def __lookup(self, key):
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.time() - entry[1] > self.ttl:
+            self.delete(key)
+            return None
+        self.__entries.move_to_end(key)
+        return entry
+
+    def __remember(self, key, entry):
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.maxsize:
+            evicted, _ = self.__entries.popitem(last=False)
+            if self.__db is not None:
+                self.__db.execute(f'DELETE FROM {self.__table} WHERE key = ?', (evicted,))
+
+    def get(self, key, default=None):
+        with self.__lock:
+            entry = self.__lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self.__lock:
+            entry = (value, time.time())
+            self.__remember(key, entry)
+            if self.__db is not None:
+                self.__db.execute(f'INSERT OR REPLACE INTO {self.__table} (key, value, stored) VALUES (?, ?, ?)',
+                                  (key, json.dumps(value), entry[1]))
+                self.__db.commit()
+
+    def delete(self, key):
+        with self.__lock:
+            self.__entries.pop(key, None)
+            if self.__db is not None:
+                self.__db.execute(f'DELETE FROM {self.__table} WHERE key = ?', (key,))
+                self.__db.commit()
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = self.misses = 0
+            if self.__db is not None:
+                self.__db.execute(f'DELETE FROM {self.__table}')
+                self.__db.commit()
+
+    def stats(self):
+        return {'size': len(self.__entries), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
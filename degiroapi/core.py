@@ -0,0 +1,1208 @@
+import contextvars
+import copy
+import json
+import time
+from datetime import datetime, timedelta
+now = datetime.now
+from degiroapi.order import Order
+from degiroapi.client_info import ClientInfo
+from degiroapi.datatypes import Data
+from degiroapi.sync import AccountState
+from degiroapi.portfolio import parse_portfolio, DEFAULT_FIELDS
+from degiroapi.metrics import Call
+from degiroapi.decoding import default_decoder
+from degiroapi.fx import FXRates
+from degiroapi.options import OptionChain
+from degiroapi.timeseries import parse_series, time_series, align_series, period_seconds, period_start, _numpy
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
+
+GET_REQUEST = 0
+POST_REQUEST = 1
+DELETE_REQUEST = 2
+PUT_REQUEST = 3
+
+
+class AuthorisationError(Exception):
+    pass
+
+class NoChangeError(Exception):
+    pass
+
+class BatchError(Exception):
+    """Raised when part of a batched call failed; ``results`` holds what did succeed, ``errors`` maps key -> exception."""
+    def __init__(self, message, results, errors):
+        super().__init__(message)
+        self.results = results
+        self.errors = errors
+
+
+# set while a client logs in again after its session expired, so the login requests don't trigger another re-login
+relogin_in_progress = contextvars.ContextVar('relogin_in_progress', default=False)
+
+
+class Request:
+    """
+    A single HTTP call to DeGiro, independent of the transport that performs it.
+
+    The constructor takes the arguments the old ``DeGiro.__request`` took and
+    normalises them into method/params/json/data/headers/cookies, so the sync and
+    the async client send exactly the same thing. Idempotent requests (by default
+    the GETs) may be retried by the transport. priority overrides the lane a
+    RateLimiter queues the request in. cache names the ResponseCache ttl of a request
+    whose response may be cached; cached is the CachedResponse a request revalidates.
+    schema names the degiroapi.schemas type a typed JSONDecoder decodes the response into.
+    """
+    def __init__(self, url, cookie=None, payload=None, headers=None, data=None, post_params=None,
+                 request_type=GET_REQUEST, error_message='An error occurred.', return_raw_response=False,
+                 idempotent=None, priority=None, cache=None, schema=None):
+        self.url = url
+        self.priority = priority
+        self.cache = cache
+        self.schema = schema
+        self.cached = None
+        self.request_type = request_type
+        self.error_message = error_message
+        self.return_raw_response = return_raw_response
+        self.params = self.json = self.data = self.headers = self.cookies = None
+
+        if request_type == DELETE_REQUEST:
+            self.method = 'DELETE'
+            self.json = payload
+        elif request_type == GET_REQUEST and cookie:
+            self.method = 'GET'
+            self.cookies = cookie
+        elif request_type == GET_REQUEST:
+            self.method = 'GET'
+            self.params = payload
+        elif request_type == POST_REQUEST and headers and data:
+            self.method = 'POST'
+            self.headers = headers
+            self.params = payload
+            self.data = data
+        elif request_type == POST_REQUEST and post_params:
+            self.method = 'POST'
+            self.params = post_params
+            self.json = payload
+        elif request_type == POST_REQUEST:
+            self.method = 'POST'
+            self.json = payload
+        elif request_type == PUT_REQUEST:
+            self.method = 'PUT'
+            self.params = post_params
+            self.json = payload
+        else:
+            raise Exception(f'Unknown request type: {request_type}')
+        self.idempotent = self.method == 'GET' if idempotent is None else idempotent
+
+    def __repr__(self):
+        return f'Request({self.method} {self.url})'
+
+    def renewed(self, replacements):
+        """A copy of this request with every string in replacements (e.g. an expired session id) replaced."""
+        replacements = {old: new for old, new in replacements.items()
+                        if isinstance(old, str) and isinstance(new, str) and old != new}
+
+        def replace(value):
+            if isinstance(value, str):
+                for old, new in replacements.items():
+                    value = value.replace(old, new)
+                return value
+            if isinstance(value, dict):
+                return {k: replace(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [replace(v) for v in value]
+            return value
+
+        request = copy.copy(self)
+        request.url, request.params, request.json, request.data, request.cookies = \
+            replace(self.url), replace(self.params), replace(self.json), replace(self.data), replace(self.cookies)
+        return request
+
+    @property
+    def encoding(self):
+        """The charset of the response (UTF-8 if it names none)."""
+        content_type = (getattr(self, 'response_headers', None) or {}).get('Content-Type', '')
+        return content_type.partition('charset=')[2].split(';')[0].strip() or 'utf-8'
+
+    def text(self, body):
+        """The response body as str, decoded with the charset of the response."""
+        if isinstance(body, str):
+            return body
+        return body.decode(self.encoding, errors='replace')
+
+    def parse(self, status_code, body, decoder=None):
+        """
+        The decoded response body (bytes or str). An empty body is "No data"; one that is
+        not valid JSON raises DecodeError.
+        """
+        if status_code == 200 or status_code == 201:
+            if self.return_raw_response:
+                return self.text(body)
+            elif not body.strip():
+                return "No data"
+            else:
+                return (decoder or default_decoder).decode(body, self.schema, self.url)
+        elif status_code == 401:
+            raise AuthorisationError("Request not authorized. Session probably expired.")
+        else:
+            raise Exception(f'{self.error_message} Response: {self.text(body)}')
+
+
+def encode_params(params):
+    """
+    Flattens a params dict the way requests does: None values are dropped, lists
+    become repeated keys and everything else is stringified (bools as 'True'/'False').
+    """
+    if params is None:
+        return None
+    encoded = []
+    for key, value in params.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for v in values:
+            if v is not None:
+                encoded.append((str(key), str(v)))
+    return encoded
+
+
+class DeGiroCore:
+    """
+    Endpoint definitions and payload building shared by ``DeGiro`` and ``AsyncDeGiro``.
+
+    Every API call is written once as a generator that yields ``Request`` objects and
+    receives the decoded response back; the subclasses only decide how a request is sent.
+    Yielding a list of requests performs them concurrently and sends back a list in the
+    same order, with the exception in place of the response for every request that failed.
+    """
+    __LOGIN_URL = 'https://trader.degiro.nl/login/secure/login'
+    __LOGIN_TOTP_URL = 'https://trader.degiro.nl/login/secure/login/totp'
+    __CONFIG_URL = 'https://trader.degiro.nl/login/secure/config'
+
+    __LOGOUT_URL = 'https://trader.degiro.nl/trading/secure/logout'
+
+    __CLIENT_INFO_URL = 'https://trader.degiro.nl/pa/secure/client'
+
+    __GET_STOCKS_URL = 'https://trader.degiro.nl/products_s/secure/v5/stocks'
+    __PRODUCT_SEARCH_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/lookup'
+    __WARRANT_SEARCH_URL = 'https://trader.degiro.nl/product_search/secure/v5/warrants'
+    __PRODUCT_INFO_URL = 'https://trader.degiro.nl/product_search/secure/v5/products/info'
+    __TRANSACTIONS_URL = 'https://trader.degiro.nl/reporting/secure/v4/transactions'
+    __ORDERS_URL = 'https://trader.degiro.nl/reporting/secure/v4/order-history'
+    __ACCOUNT_URL = 'https://trader.degiro.nl/reporting/secure/v6/accountoverview'
+    __DIVIDENDS_URL = 'https://trader.degiro.nl/reporting/secure/v3/ca/'
+
+    __PLACE_ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/checkOrder'
+    __ORDER_URL = 'https://trader.degiro.nl/trading/secure/v5/order/'
+
+    __DATA_URL = 'https://trader.degiro.nl/trading/secure/v5/update/'
+    __PRICE_DATA_URL = 'https://charting.vwdservices.com/hchart/v1/deGiro/data.js'
+
+    __COMPANY_RATIOS_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-ratios/'
+
+    __CSV_PORTFOLIO_URL = 'https://trader.degiro.nl/reporting/secure/v3/positionReport/csv'
+    __CSV_TRANSACTIONS_URL = 'https://trader.degiro.nl/reporting/secure/v3/transactionReport/csv'
+    __CSV_ACCOUNT_URL = 'https://trader.degiro.nl/reporting/secure/v3/cashAccountReport/csv'
+    __COMPANY_PROFILE_URL = 'https://trader.degiro.nl/dgtbxdsservice/company-profile/v2/'
+    __FINANCIALS_URL= 'https://trader.degiro.nl/dgtbxdsservice/financial-statements/'
+
+    __NEWS_URL = 'https://trader.degiro.nl/dgtbxdsservice/newsfeed/v2/news-by-company'
+
+    __OPTION_TABLE_URL = "https://trader.degiro.nl/product_search/secure/v5/options/"
+
+    # the chart periods a price history refresh picks from, shortest first
+    __PRICE_PERIODS = ('P1D', 'P1W', 'P1M', 'P3M', 'P6M', 'P1Y', 'P3Y', 'P5Y', 'P50Y')
+
+    client_token = any
+    session_id = any
+    client_info = any
+    confirmation_id = any
+
+    # set to a degiroapi.cache.TTLCache (or anything with get/set) to cache product_info by product id
+    product_cache = None
+    # set to a degiroapi.orderbook.OrderBook to serve get_order/modify_order from a local index (kept current through
+    # account_state)
+    order_book = None
+    # degiroapi.sync.AccountState kept current by sync(); created on the first call
+    account_state = None
+    # set to a degiroapi.ratelimit.RateLimiter to pace requests per endpoint family
+    rate_limiter = None
+    # set to a callable returning the login() keyword arguments to log in again automatically when the session expires
+    credentials = None
+    # set to a degiroapi.responsecache.ResponseCache to cache company_ratios, company_profile, financials and news
+    response_cache = None
+    # set to a degiroapi.decoding.JSONDecoder to choose the JSON library or decode into typed schemas
+    decoder = None
+    # degiroapi.fx.FXRates holding the quotes exchange_rates() fetched; created on the first call, set one to choose
+    # max_age, the pivot currency or more pair ids
+    fx_rates = None
+    # set to a degiroapi.searchindex.ProductIndex to answer search_products/search_warrants from the stock lists
+    # and search results seen before: exact id/ISIN/symbol hits or a full page of name matches, else products/lookup
+    product_index = None
+
+    def __init__(self):
+        self._vwd_ids = {}
+        # objects with any of before(request), after(call) and error(call, exception), e.g. a metrics.MetricsCollector
+        self.hooks = []
+
+    def _before(self, request):
+        """Runs the before hooks and returns the Call to complete in _parse/_failed (None without hooks)."""
+        if not self.hooks:
+            return None
+        for hook in self.hooks:
+            if hasattr(hook, 'before'):
+                hook.before(request)
+        call = Call(request)
+        call.started = time.perf_counter()
+        return call
+
+    def _failed(self, call, exception):
+        """Runs the error hooks for a request that did not get a response."""
+        if call is not None:
+            call.elapsed = time.perf_counter() - call.started
+            call.attempts = getattr(call.request, 'attempts', 1)
+            self.__hook('error', call, exception)
+
+    def _streamed(self, call, request, received):
+        """Reports a streamed response that was read to the end (received bytes) to the after hooks."""
+        if call is not None:
+            call.elapsed = time.perf_counter() - call.started
+            call.status_code = 200
+            call.bytes = received
+            call.attempts = getattr(request, 'attempts', 1)
+            self.__hook('after', call)
+
+    def _cached(self, request):
+        """
+        Consults response_cache for a cacheable request. Returns (request, cached, background):
+        cached is the CachedResponse to answer with, if any; otherwise request is what to send,
+        made conditional when there is a stored copy. background is a conditional request to
+        send without waiting for it, when a stale copy is served.
+        """
+        if request.cache is None or request.cached is not None or self.response_cache is None:
+            return request, None, None
+        cached = self.response_cache.lookup(request)
+        if cached is None:
+            return request, None, None
+        if cached.fresh:
+            return request, cached, None
+        if cached.servable:
+            revalidate = self.response_cache.begin_revalidation(cached)
+            return request, cached, self.response_cache.conditional(request, cached) if revalidate else None
+        return self.response_cache.conditional(request, cached), None, None
+
+    def _parse(self, call, request, status_code, body):
+        """request.parse, timed and reported to the after (and, if it raises, error) hooks."""
+        received = status_code
+        cacheable = request.cache is not None and self.response_cache is not None
+        if cacheable:
+            status_code, body = self.response_cache.update(request, status_code, body)
+        if call is None:
+            result = request.parse(status_code, body, self.decoder)
+        else:
+            decode_started = time.perf_counter()
+            call.elapsed = decode_started - call.started
+            call.status_code = received
+            call.bytes = getattr(request, 'response_bytes', len(body))
+            call.attempts = getattr(request, 'attempts', 1)
+            try:
+                result = request.parse(status_code, body, self.decoder)
+            except Exception as e:
+                call.decode_elapsed = time.perf_counter() - decode_started
+                self.__hook('after', call)
+                self.__hook('error', call, e)
+                raise
+            call.decode_elapsed = time.perf_counter() - decode_started
+            self.__hook('after', call)
+        # only a body that decoded is worth serving again
+        if cacheable and received == 200:
+            self.response_cache.store(request, body)
+        return result
+
+    def __hook(self, name, *args):
+        for hook in self.hooks:
+            if hasattr(hook, name):
+                getattr(hook, name)(*args)
+
+    def logged(self): return type(self.session_id)==str
+
+    def _login(self, username, password, totp=None):
+        login_payload = {
+            'username': username,
+            'password': password,
+            'isPassCodeReset': False,
+            'isRedirectToMobile': False
+        }
+        if totp:
+            login_payload["oneTimePassword"] = totp
+            url = DeGiroCore.__LOGIN_TOTP_URL
+        else:
+            url = DeGiroCore.__LOGIN_URL
+        login_response = yield Request(url, None, login_payload, request_type=POST_REQUEST,
+                                       error_message='Could not login.')
+        self.session_id = login_response['sessionId']
+        client_info_payload = {'sessionId': self.session_id}
+        client_info_response = yield Request(DeGiroCore.__CLIENT_INFO_URL, None, client_info_payload,
+                                             error_message='Could not get client info.')
+        self.client_info = ClientInfo(client_info_response['data'])
+
+        cookie = {
+            'JSESSIONID': self.session_id
+        }
+
+        client_token_response = yield Request(DeGiroCore.__CONFIG_URL, cookie=cookie, request_type=GET_REQUEST,
+                                              error_message='Could not get client config.')
+        self.client_token = client_token_response['data']['clientId']
+
+    def _logout(self):
+        logout_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id,
+        }
+        yield Request(DeGiroCore.__LOGOUT_URL + ';jsessionid=' + self.session_id, None, logout_payload,
+                      error_message='Could not log out')
+
+        self.session_id = any
+
+    def _indexed(self, products):
+        """Adds products to product_index (if set) and returns them."""
+        if self.product_index is not None:
+            self.product_index.add(products)
+        return products
+
+    def _local_search(self, search_text, limit, product_type=None):
+        """
+        The product_index answer to a search, or None to ask products/lookup: only exact id /
+        ISIN / symbol matches, or a full page of name matches, are trusted; the index holds
+        what was seen before, so fewer matches may miss the product that was meant.
+        """
+        if self.product_index is None:
+            return None
+        exact = [product for product in self.product_index.lookup(search_text)
+                 if product_type is None or product.get('productType') == product_type]
+        if exact:
+            return exact[:limit]
+        products = self.product_index.search(search_text, limit, product_type, fuzzy=False)
+        return products if len(products) >= limit else None
+
+    def _search_products(self, search_text, limit=1):
+        products = self._local_search(search_text, limit)
+        if products is not None:
+            return products
+        product_search_payload = {
+            'searchText': search_text,
+            'limit': limit,
+            'offset': 0,
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return self._indexed((yield Request(DeGiroCore.__PRODUCT_SEARCH_URL, None, product_search_payload,
+                                            error_message='Could not get products.'))['products'])
+
+    def _search_warrants(self, search_text, limit=1):
+        products = self._local_search(search_text, limit, product_type='WARRANT')
+        if products is not None:
+            return products
+        warrant_search_payload = {
+            'searchText': search_text,
+            'limit': limit,
+            'offset': 0,
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return self._indexed((yield Request(DeGiroCore.__WARRANT_SEARCH_URL, None, warrant_search_payload,
+                                            error_message='Could not get products.'))['products'])
+
+    def _option_table_request(self, isin, limit=1, offset=0, active=True, require_total=False):
+        option_table_payload = {
+            'underlyingIsin': isin,
+            'sortColumns': "expirationDate",
+            'requireTotal': 'true' if require_total else 'false',
+            'sortTypes': "asc",
+            'offset': offset,
+            'limit': limit,
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        if active:
+            option_table_payload['strikeType']='active'
+        return Request(DeGiroCore.__OPTION_TABLE_URL, None, option_table_payload,
+                       error_message='Could not get option table.')
+
+    def _option_table(self, isin, limit=1, offset=0, active=True):
+        return (yield self._option_table_request(isin, limit, offset, active))['products']
+
+    def _option_chains(self, isins, active=True, page_size=500, workers=8):
+        isins = list(dict.fromkeys(isins))
+        # the first pages tell how many options each underlying has
+        first_pages = yield [self._option_table_request(isin, page_size, 0, active, require_total=True)
+                             for isin in isins]
+        products = {}
+        errors = {}
+        pages = []
+        # underlyings whose total is unknown: paged until a page is not full
+        open_ended = set()
+        for isin, page in zip(isins, first_pages):
+            if isinstance(page, Exception):
+                errors[isin] = page
+                continue
+            products[isin] = {0: page['products']}
+            if page.get('total') is not None:
+                pages += [(isin, offset) for offset in self._page_offsets(page['total'], page_size)]
+            elif len(page['products']) == page_size:
+                open_ended.add(isin)
+                pages.append((isin, page_size))
+
+        while pages:
+            group, pages = pages[:workers], pages[workers:]
+            responses = yield [self._option_table_request(isin, page_size, offset, active) for isin, offset in group]
+            for (isin, offset), page in zip(group, responses):
+                if isin in errors:
+                    continue
+                if isinstance(page, Exception):
+                    errors[isin] = page
+                    products.pop(isin, None)
+                    continue
+                products[isin][offset] = page['products']
+                if isin in open_ended and len(page['products']) == page_size:
+                    pages.append((isin, offset + page_size))
+
+        chains = {isin: OptionChain([product for offset in sorted(pages_by_offset)
+                                     for product in pages_by_offset[offset]], isin)
+                  for isin, pages_by_offset in products.items()}
+        if errors:
+            raise BatchError(f'Could not get the option chain of {len(errors)} of {len(isins)} underlyings.',
+                             chains, errors)
+        return chains
+
+    def _option_chain(self, isin, active=True, page_size=500, workers=8):
+        try:
+            chains = yield from self._option_chains([isin], active, page_size, workers)
+        except BatchError as e:
+            raise e.errors[isin]
+        return chains[isin]
+
+    def _product_info(self, product_id):
+        if self.product_cache is not None:
+            cached = self.product_cache.get(str(product_id))
+            if cached is not None:
+                return cached
+        product_info_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        info = (yield Request(DeGiroCore.__PRODUCT_INFO_URL, None, product_info_payload,
+                              headers={'content-type': 'application/json'},
+                              data=json.dumps([str(product_id)]),
+                              request_type=POST_REQUEST, idempotent=True,
+                              error_message='Could not get product info.', schema='ProductInfo'))['data'][str(product_id)]
+        if self.product_cache is not None:
+            self.product_cache.set(str(product_id), info)
+        return info
+
+    def _product_infos(self, product_ids, batch_size=1000):
+        # 3 and '3' are the same product, as in product_cache and _vwd_ids: keep the first spelling
+        unique = {}
+        for product_id in product_ids:
+            unique.setdefault(str(product_id), product_id)
+        product_ids = list(unique.values())
+        results = {}
+        errors = {}
+        missing = []
+        for product_id in product_ids:
+            cached = self.product_cache.get(str(product_id)) if self.product_cache is not None else None
+            if cached is not None:
+                results[product_id] = cached
+            else:
+                missing.append(product_id)
+        product_info_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        responses = (yield [Request(DeGiroCore.__PRODUCT_INFO_URL, None, product_info_payload,
+                                    headers={'content-type': 'application/json'},
+                                    data=json.dumps([str(product_id) for product_id in chunk]),
+                                    request_type=POST_REQUEST, idempotent=True,
+                                    error_message='Could not get product info.', schema='ProductInfo')
+                            for chunk in chunks]) if chunks else []
+        for chunk, response in zip(chunks, responses):
+            for product_id in chunk:
+                if isinstance(response, Exception):
+                    errors[product_id] = response
+                elif str(product_id) in response['data']:
+                    results[product_id] = response['data'][str(product_id)]
+                    if self.product_cache is not None:
+                        self.product_cache.set(str(product_id), results[product_id])
+                else:
+                    errors[product_id] = KeyError(product_id)
+        if errors:
+            raise BatchError(f'Could not get product info for {len(errors)} of {len(product_ids)} products.',
+                             results, errors)
+        return results
+
+    def _company_ratios(self, product_isin):
+        product_info_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return (yield Request(DeGiroCore.__COMPANY_RATIOS_URL + product_isin,
+                              None, product_info_payload,
+                              headers={'content-type': 'application/json'},
+                              data=None,
+                              request_type=GET_REQUEST,
+                              error_message='Could not get company ratios.',
+                              cache='company_ratios'))['data']
+
+    def _company_profile(self, product_isin):
+        product_info_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return (yield Request(DeGiroCore.__COMPANY_PROFILE_URL+product_isin,
+                              None, product_info_payload,
+                              headers={'content-type': 'application/json'},
+                              data=None,
+                              request_type=GET_REQUEST,
+                              error_message='Could not get company profile.',
+                              cache='company_profile'))['data']
+
+    def _financials(self, product_isin):
+        product_info_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return (yield Request(DeGiroCore.__FINANCIALS_URL+product_isin,
+                              None, product_info_payload,
+                              headers={'content-type': 'application/json'},
+                              data=None,
+                              request_type=GET_REQUEST,
+                              error_message='Could not get financial statement.',
+                              cache='financials'))['data']
+
+    def _news_request(self, product_isin, offset=0, limit=10, language='en%2Cnl', cache='news'):
+        news_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        url= DeGiroCore.__NEWS_URL + '?isin={0}&limit={1}&offset={2}&languages={3}'.format(product_isin, limit, offset, language)
+        return Request(url,
+                       None, news_payload,
+                       headers={'content-type': 'application/json'},
+                       data=None,
+                       request_type=GET_REQUEST,
+                       error_message='Could not get news.',
+                       cache=cache)
+
+    def _news(self, product_isin, offset=0, limit=10, language='en%2Cnl'):
+        return (yield self._news_request(product_isin, offset, limit, language))['data']['items']
+
+    def _news_since(self, tracker, product_isin, page_size=10, max_pages=10, language='en%2Cnl'):
+        """
+        The news items of product_isin newer than the newest one tracker has seen, newest first:
+        pages are fetched until one reaches a seen item (only the first page on the first poll).
+        """
+        first_poll = tracker.newest(product_isin) is None
+        new = []
+        for page in range(max_pages):
+            # not from the response cache, which would serve the same page for a while
+            items = (yield self._news_request(product_isin, page * page_size, page_size, language,
+                                              cache=None))['data']['items']
+            fresh = []
+            for item in items:
+                if tracker.known(product_isin, item):
+                    break
+                fresh.append(item)
+            new += fresh
+            if first_poll or len(fresh) < len(items) or len(items) < page_size:
+                break
+        tracker.update(product_isin, new)
+        return new
+
+    def _transactions_request(self, from_date, to_date, group_transactions=False):
+        transactions_payload = {
+            'fromDate': from_date.strftime('%d/%m/%Y'),
+            'toDate': to_date.strftime('%d/%m/%Y'),
+            'groupTransactionsByOrder': group_transactions,
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return Request(DeGiroCore.__TRANSACTIONS_URL, None, transactions_payload,
+                       error_message='Could not get transactions.', schema='Transactions')
+
+    def _transactions(self, from_date=None, to_date=None, group_transactions=False):
+        if not from_date:
+            from_date=now().date()
+        if not to_date:
+            to_date=now().date()
+        return (yield self._transactions_request(from_date, to_date, group_transactions))['data']
+
+    def _sync_transactions(self, store, from_date=None, window_days=180, workers=4):
+        start = store.synced_until or from_date
+        if start is None:
+            raise Exception('from_date is required for the first sync of a TransactionStore')
+        # the last synced day is fetched again, transactions may have been added to it since
+        windows = self._date_windows(start, now().date(), window_days)
+        added = 0
+        for i in range(0, len(windows), workers):
+            group = windows[i:i + workers]
+            responses = yield [self._transactions_request(window_start, window_end) for window_start, window_end in group]
+            for (window_start, window_end), response in zip(group, responses):
+                if isinstance(response, Exception):
+                    raise response
+                added += store.add(response['data'])
+                store.synced_until = window_end
+        return added
+
+    def _future_dividends(self):
+        dividends_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return (yield Request(DeGiroCore.__DIVIDENDS_URL + str(self.client_info.account_id), None, dividends_payload,
+                              error_message='Could not get future dividends.'))['data']
+
+    def _account_overview(self, from_date=None, to_date=None):
+        if not from_date:
+            from_date=now().date()
+        if not to_date:
+            to_date=now().date()
+        account_payload = {
+            'fromDate': from_date.strftime('%d/%m/%Y'),
+            'toDate': to_date.strftime('%d/%m/%Y'),
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return (yield Request(DeGiroCore.__ACCOUNT_URL, None, account_payload,
+                              error_message='Could not get account overview.'))['data']
+
+    def _orders(self, from_date=None, to_date=None, not_executed=None):
+        if not from_date:
+            from_date=now().date()
+        if not to_date:
+            to_date=now().date()
+        orders_payload = {
+            'fromDate': from_date.strftime('%d/%m/%Y'),
+            'toDate': to_date.strftime('%d/%m/%Y'),
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        # max 90 days
+        if (to_date - from_date).days > 90:
+            raise Exception('The maximum timespan is 90 days')
+        data = (yield Request(DeGiroCore.__ORDERS_URL, None, orders_payload, error_message='Could not get orders.'))['data']
+        data_not_executed = []
+        if not_executed:
+            for d in data:
+                if d['isActive']:
+                    data_not_executed.append(d)
+            return data_not_executed
+        else:
+            return data
+
+    @staticmethod
+    def _date_windows(from_date, to_date=None, days=90):
+        """Splits [from_date, to_date] into consecutive, non-overlapping windows spanning at most `days` days."""
+        from_date = from_date.date() if isinstance(from_date, datetime) else from_date
+        to_date = to_date or now().date()
+        to_date = to_date.date() if isinstance(to_date, datetime) else to_date
+        windows = []
+        while from_date <= to_date:
+            window_end = min(from_date + timedelta(days=days), to_date)
+            windows.append((from_date, window_end))
+            from_date = window_end + timedelta(days=1)
+        return windows
+
+    @staticmethod
+    def _unseen_orders(orders, seen):
+        """The orders of one window sorted by creation time, without those whose orderId is in `seen`."""
+        unseen = []
+        for order in sorted(orders, key=lambda order: order.get('created') or ''):
+            if order['orderId'] not in seen:
+                seen.add(order['orderId'])
+                unseen.append(order)
+        return unseen
+
+    def _delete_order(self, orderId):
+        delete_order_params = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id,
+        }
+
+        return (yield Request(DeGiroCore.__ORDER_URL + orderId + ';jsessionid=' + self.session_id, None,
+                              delete_order_params,
+                              request_type=DELETE_REQUEST,
+                              error_message='Could not delete order' + " " + orderId))
+
+    def _refresh_order_book(self):
+        # the orders feed and its token are shared with sync() through account_state
+        if self.account_state is None:
+            self.account_state = AccountState()
+        self.account_state.track(Data.Type.ORDERS)
+        self.order_book.attach(self.account_state)
+        if not self.order_book.loaded:
+            from_date = (now() - timedelta(days=90)).date()  # max is 90 days
+            self.order_book.load((yield from self._orders(from_date)))
+        response = yield self._update_request({Data.Type.ORDERS: self.account_state.tokens[Data.Type.ORDERS]})
+        self.account_state.apply(response)
+        return self.order_book
+
+    def _get_order(self, orderId):
+        if self.order_book is not None:
+            yield from self._refresh_order_book()
+            return self.order_book.get(orderId)
+        from_date = (now() - timedelta(days=90)).date()  # max is 90 days
+        filtered_orders = [x for x in (yield from self._orders(from_date)) if x['orderId'] == orderId]
+        if len(filtered_orders) == 1:
+            return filtered_orders[0]
+        elif len(filtered_orders) > 1:
+            return filtered_orders[-1]
+        else:
+            return None
+
+    def _modify_order(self, orderId, orderType=None, productId=None, timeType=None, size=None, limit=None, stop_loss=None):
+        check_dc = locals()
+        buysell_dc = {"S": "SELL", "B": "BUY"}
+        check_dc.pop("self")
+        check_dc.pop('orderId')
+        if all(v==None for v in check_dc.values()):
+            raise NoChangeError('This would change nothing to the order')
+        old = yield from self._get_order(orderId)
+        if not old:
+            raise ValueError("Order not found")
+        assert old['isActive'], "This order is not active anymore"
+        order_payload = {
+            'buySell': buysell_dc[old['buysell']],
+            'productId': int(old['productId']),
+            'timeType': timeType or int(old['orderTimeTypeId']) ,
+            'size': size or old['size'],
+            'price': limit or old['price'],
+            'stopPrice': stop_loss or old['stopPrice']
+        }
+        if orderType != None:
+            order_payload['orderType'] = orderType
+        else:
+            order_payload['orderType'] = int(old['orderTypeId'])
+        old_order_payload = {
+            'buySell': buysell_dc[old['buysell']],
+            'orderType': int(old['orderTypeId']) ,
+            'productId': int(old['productId']),
+            'timeType': int(old['orderTimeTypeId']) ,
+            'size':  old['size'],
+            'price':  old['price'],
+            'stopPrice': old['stopPrice']
+        }
+        if order_payload == old_order_payload:
+            raise NoChangeError('This would change nothing to the order')
+
+        return (yield Request(DeGiroCore.__ORDER_URL + orderId + ';jsessionid=' + self.session_id, None,
+                              order_payload, request_type=PUT_REQUEST,
+                              error_message='Could not modify order' + " " + orderId))
+
+    @staticmethod
+    def filtercashfunds(cashfunds):
+        data = []
+        for item in cashfunds['cashFunds']['value']:
+            if item['value'][2]['value'] != 0:
+                data.append(item['value'][1]['value'] + " " + str(item['value'][2]['value']))
+        return data
+
+    @staticmethod
+    def filterportfolio(portfolio, filter_zero=None, fields=DEFAULT_FIELDS, columnar=False):
+        return parse_portfolio(portfolio, fields, filter_zero, columnar)
+
+    def _update_request(self, data_payload):
+        """Request to the update endpoint; data_payload maps data types to their lastUpdated token (0 for everything)."""
+        return Request(DeGiroCore.__DATA_URL + str(self.client_info.account_id) + ';jsessionid=' + self.session_id,
+                       None,
+                       data_payload,
+                       error_message='Could not get data', schema='Update')
+
+    def _sync(self, datatypes=None):
+        if self.account_state is None:
+            self.account_state = AccountState(datatypes or AccountState.DEFAULT_DATATYPES)
+        response = yield self._update_request(self.account_state.payload())
+        return self.account_state.apply(response)
+
+    def _getdata(self, datatype, filter_zero=None, incremental=False, fields=DEFAULT_FIELDS, columnar=False):
+        if incremental:
+            yield from self._sync()
+            if datatype not in self.account_state.datatypes:
+                raise ValueError(f'{datatype} is not synced by this client')
+            response = self.account_state.snapshot(datatype)
+        else:
+            data_payload = {
+                datatype: 0
+            }
+            response = yield self._update_request(data_payload)
+
+        if datatype == Data.Type.CASHFUNDS:
+            return self.filtercashfunds(response)
+        elif datatype == Data.Type.PORTFOLIO:
+            return self.filterportfolio(response, filter_zero, fields, columnar)
+        else:
+            return response
+
+    @staticmethod
+    def _vwd_identifier(product_info):
+        """The vwd chart identifier of a product, e.g. 'issueid:360148977'."""
+        try:
+            return product_info['vwdIdentifierType'] + ':' + product_info['vwdId']
+        except (KeyError, TypeError):
+            try:
+                return 'issueid:' + product_info['vwdIdSecondary']
+            except (KeyError, TypeError):
+                return 'vwdkey:' + product_info['vwdId']
+
+    def _vwd_identifiers(self, product_ids):
+        """Resolves vwd identifiers, fetching product info only for ids not resolved before."""
+        missing = [product_id for product_id in product_ids if str(product_id) not in self._vwd_ids]
+        errors = {}
+        if missing:
+            try:
+                infos = yield from self._product_infos(missing)
+            except BatchError as e:
+                infos, errors = e.results, e.errors
+            for product_id, info in infos.items():
+                self._vwd_ids[str(product_id)] = self._vwd_identifier(info)
+        return {product_id: self._vwd_ids[str(product_id)] for product_id in product_ids
+                if str(product_id) in self._vwd_ids}, errors
+
+    def _real_time_price(self, product_id, interval, resolution='PT1M', _type='price', arrays=False):
+        vwd_identifier = self._vwd_ids.get(str(product_id))
+        if vwd_identifier is None:
+            product_info = yield from self._product_info(product_id)
+            vwd_identifier = self._vwd_ids[str(product_id)] = self._vwd_identifier(product_info)
+
+        price_payload = {
+            'requestid': 1,
+            'resolution': resolution,
+            'period': interval,
+
+            'series': [vwd_identifier, _type + ':' + vwd_identifier],
+            'userToken': self.client_token
+        }
+
+        series = (yield Request(DeGiroCore.__PRICE_DATA_URL, None, price_payload,
+                                error_message='Could not get real time price'))['series']
+        return parse_series(time_series(series)) if arrays else series
+
+    @staticmethod
+    def _match_series(returned, series_ids):
+        """
+        The series of a chart response per product of series_ids ({product_id: [series id, ...]}),
+        matched by id, or by position when the ids differ but every product got its series.
+        Products whose series are missing are left out.
+        """
+        by_id = {series.get('id'): series for series in returned}
+        width = len(next(iter(series_ids.values()), ()))
+        matched = {}
+        for n, (product_id, ids) in enumerate(series_ids.items()):
+            if all(key in by_id for key in ids):
+                matched[product_id] = [by_id[key] for key in ids]
+            elif len(returned) == width * len(series_ids):
+                matched[product_id] = returned[width * n:width * (n + 1)]
+        return matched
+
+    def _real_time_prices(self, product_ids, interval, resolution='PT1M', _type='price', batch_size=50, arrays=False,
+                          align=None):
+        product_ids = list(dict.fromkeys(product_ids))
+        identifiers, errors = yield from self._vwd_identifiers(product_ids)
+        resolved = [product_id for product_id in product_ids if product_id in identifiers]
+        chunks = [resolved[i:i + batch_size] for i in range(0, len(resolved), batch_size)]
+        requests = []
+        for chunk in chunks:
+            series = []
+            for product_id in chunk:
+                series += [identifiers[product_id], _type + ':' + identifiers[product_id]]
+            price_payload = {
+                'requestid': 1,
+                'resolution': resolution,
+                'period': interval,
+                'series': series,
+                'userToken': self.client_token
+            }
+            requests.append(Request(DeGiroCore.__PRICE_DATA_URL, None, price_payload,
+                                    error_message='Could not get real time price'))
+        responses = (yield requests) if requests else []
+
+        results = {}
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                errors.update((product_id, response) for product_id in chunk)
+                continue
+            matched = self._match_series(response['series'], {
+                product_id: [identifiers[product_id], _type + ':' + identifiers[product_id]] for product_id in chunk})
+            for product_id in chunk:
+                if product_id in matched:
+                    results[product_id] = matched[product_id]
+                else:
+                    errors[product_id] = KeyError(product_id)
+        if arrays or align:
+            results = {product_id: parse_series(time_series(series)) for product_id, series in results.items()}
+        if align:
+            results = align_series(results, how=align)
+        if errors:
+            raise BatchError(f'Could not get real time price for {len(errors)} of {len(product_ids)} products.',
+                             results, errors)
+        return results
+
+    def _price_period(self, store, product_id, interval, resolution, _type, fetched):
+        """The period to fetch to bring the stored history up to date, or None if it is recent enough."""
+        coverage = store.coverage(product_id, resolution, _type)
+        if coverage is None:
+            return interval
+        since, last, requested, last_fetched = coverage
+        step = period_seconds(resolution)
+        # the held bars start after the interval: fetch it whole, unless that was asked for before
+        # and the endpoint had nothing older (a younger listing, or its cap on the number of points)
+        np = _numpy()
+        short = since is None or since > period_start(np.datetime64(last, 's'), interval).astype(np.int64) + step
+        if short and requested > fetched - period_seconds(interval) + step:
+            return interval
+        elapsed = fetched - last_fetched
+        if elapsed < min(step, 60):
+            return None
+        for period in DeGiroCore.__PRICE_PERIODS:
+            if period_seconds(period) >= min(elapsed + step, period_seconds(interval)):
+                return period
+        return interval
+
+    def _price_histories(self, store, product_ids, interval, resolution='PT1M', _type='price', batch_size=50,
+                         align=None):
+        interval = interval[0] if isinstance(interval, tuple) else interval
+        product_ids = list(dict.fromkeys(product_ids))
+        fetched = now().timestamp()
+        groups = {}
+        for product_id in product_ids:
+            period = self._price_period(store, product_id, interval, resolution, _type, fetched)
+            if period is not None:
+                groups.setdefault(period, []).append(product_id)
+
+        errors = {}
+        for period, group in groups.items():
+            try:
+                results = yield from self._real_time_prices(group, period, resolution, _type, batch_size, arrays=True)
+            except BatchError as e:
+                results = e.results
+                errors.update(e.errors)
+            for product_id, arrays in results.items():
+                store.add(product_id, resolution, _type, arrays, fetched - period_seconds(period), fetched)
+
+        histories = {product_id: store.query(product_id, resolution, _type, period=interval)
+                     for product_id in product_ids if product_id not in errors}
+        if align:
+            histories = align_series(histories, how=align)
+        if errors:
+            raise BatchError(f'Could not get the price history of {len(errors)} of {len(product_ids)} products.',
+                             histories, errors)
+        return histories
+
+    def _price_history(self, store, product_id, interval, resolution='PT1M', _type='price'):
+        try:
+            histories = yield from self._price_histories(store, [product_id], interval, resolution, _type)
+        except BatchError as e:
+            raise e.errors[product_id]
+        return histories[product_id]
+
+    def _place_order(self, buySell, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        place_order_params = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id,
+        }
+        place_order_payload = {
+            'buySell': buySell,
+            'orderType': orderType,
+            'productId': productId,
+            'timeType': timeType,
+            'size': size,
+            'price': limit,
+            'stopPrice': stop_loss,
+        }
+        if orderType != Order.Type.STOPLIMIT and orderType != Order.Type.MARKET \
+                and orderType != Order.Type.LIMIT and orderType != Order.Type.STOPLOSS:
+            raise Exception('Invalid order type')
+
+        if timeType != Order.Time.DAY and timeType != Order.Time.GTC:
+            raise Exception('Invalid time type')
+
+        place_check_order_response = yield Request(DeGiroCore.__PLACE_ORDER_URL + ';jsessionid=' + self.session_id, None,
+                                                   place_order_payload, place_order_params,
+                                                   request_type=POST_REQUEST,
+                                                   error_message='Could not place order')
+
+        self.confirmation_id = place_check_order_response['data']['confirmationId']
+
+        resp = yield Request(DeGiroCore.__ORDER_URL + self.confirmation_id + ';jsessionid=' + self.session_id, None,
+                             place_order_payload, place_order_params,
+                             request_type=POST_REQUEST,
+                             error_message='Could not confirm order')
+        return resp
+
+    def _buyorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        return (yield from self._place_order("BUY", orderType, productId, timeType, size, limit, stop_loss))
+
+    def _sellorder(self, orderType, productId, timeType, size, limit=None, stop_loss=None):
+        return (yield from self._place_order("SELL", orderType, productId, timeType, size, limit, stop_loss))
+
+    def _get_stock_list(self, indexId, stockCountryId, offset=0):
+        stock_list_params = {
+            'indexId': indexId,
+            'stockCountryId': stockCountryId,
+            'offset': offset,
+            'limit': None,
+            'requireTotal': "true",
+            'sortColumns': "name",
+            'sortTypes': "asc",
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return self._indexed((yield Request(DeGiroCore.__GET_STOCKS_URL, None, stock_list_params,
+                                            error_message='Could not get stock list', schema='StockList'))['products'])
+
+    def _download_csv(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl'):
+        return (yield self._csv_request(csv_type, from_date, to_date, country, lang))
+
+    def _csv_requests(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl', chunk_days=None):
+        """
+        The requests for a CSV report: one, or with chunk_days one per consecutive range of at
+        most chunk_days days (ACCOUNT and TRANSACTIONS only; a PORTFOLIO report is a snapshot).
+        """
+        if chunk_days is None or csv_type.upper() == 'PORTFOLIO' or from_date is None:
+            return [self._csv_request(csv_type, from_date, to_date, country, lang)]
+        return [self._csv_request(csv_type, window_from, window_to, country, lang)
+                for window_from, window_to in self._date_windows(from_date, to_date, chunk_days)]
+
+    def _csv_request(self, csv_type, from_date=None, to_date=None, country='NL', lang='nl'):
+        if csv_type.upper() not in ('ACCOUNT', 'PORTFOLIO', 'TRANSACTIONS'):
+            raise Exception("csv_type should be one of ('ACCOUNT', 'PORTFOLIO', 'TRANSACTIONS')")
+        if csv_type.upper() in ('PORTFOLIO', 'TRANSACTIONS') and from_date is None:
+            raise Exception("from_date is required for csv_type %s" % csv_type.upper())
+        if to_date is None:
+            to_date = datetime.now()
+        csv_payload = {
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id,
+            'fromDate': from_date.strftime('%d/%m/%Y'),
+            'toDate': to_date.strftime('%d/%m/%Y'),
+            'country': country,
+            'lang': lang
+        }
+        url = None
+        if csv_type.upper() == 'ACCOUNT':
+            url = DeGiroCore.__CSV_ACCOUNT_URL
+        if csv_type.upper() == 'PORTFOLIO':
+            url = DeGiroCore.__CSV_PORTFOLIO_URL
+        if csv_type.upper() == 'TRANSACTIONS':
+            url = DeGiroCore.__CSV_TRANSACTIONS_URL
+        return Request(url, None, csv_payload, error_message='Could not get csv', return_raw_response=True)
+
+    def _last_prices(self, product_ids):
+        """lastPrice of each product, all in one chart request (without the price history)."""
+        identifiers, errors = yield from self._vwd_identifiers(product_ids)
+        if errors:
+            raise BatchError(f'Could not get the product info of {len(errors)} of {len(product_ids)} products.',
+                             {}, errors)
+        price_payload = {
+            'requestid': 1,
+            'resolution': 'PT1M',
+            'period': 'P1D',
+            'series': list(identifiers.values()),
+            'userToken': self.client_token
+        }
+        returned = (yield Request(DeGiroCore.__PRICE_DATA_URL, None, price_payload,
+                                  error_message='Could not get real time price'))['series']
+        matched = self._match_series(returned, {product_id: [identifier]
+                                                for product_id, identifier in identifiers.items()})
+        prices = {}
+        for product_id, identifier in identifiers.items():
+            # a halted or delisted product may come back without data or without a lastPrice
+            last_price = matched.get(product_id, [{}])[0].get('data', {}).get('lastPrice')
+            if last_price is None:
+                errors[product_id] = KeyError(f'No lastPrice for product {product_id} ({identifier})')
+            else:
+                prices[product_id] = last_price
+        if errors:
+            raise BatchError(f'Could not get the last price of {len(errors)} of {len(product_ids)} products.',
+                             prices, errors)
+        return prices
+
+    def _fx(self, conversions, max_age=None):
+        """
+        Fetches the quotes needed for the (from, to) currency conversions that are older than
+        max_age (fx_rates.max_age by default), returns fx_rates.
+        """
+        if self.fx_rates is None:
+            self.fx_rates = FXRates()
+        rates = self.fx_rates
+        stale = rates.stale((pair for base, quote in conversions for pair in rates.pairs(base, quote)), max_age)
+        if stale:
+            pairs = {rates.pair_ids[pair]: pair for pair in stale}
+            fetched = time.time()
+            try:
+                prices = yield from self._last_prices(list(pairs))
+            except BatchError as e:
+                # keep the quotes that did come back, report the pairs that did not
+                for product_id, last_price in e.results.items():
+                    rates.set(pairs[product_id], last_price, fetched)
+                raise BatchError(f'Could not get the quote of {len(e.errors)} of {len(pairs)} currency pairs.', rates,
+                                 {pairs[product_id]: error for product_id, error in e.errors.items()})
+            for product_id, last_price in prices.items():
+                rates.set(pairs[product_id], last_price, fetched)
+        return rates
+
+    def _exchange_rates(self, currencies, to='EUR'):
+        currencies = list(dict.fromkeys(currencies))
+        rates = yield from self._fx([(currency, to) for currency in currencies])
+        return {currency: rates.rate(currency, to) for currency in currencies}
+
+    def _convert(self, amounts, currencies, to='EUR'):
+        rates = yield from self._fx([(currency, to) for currency in FXRates.codes(currencies)])
+        return rates.convert(amounts, currencies, to)
+
+    def _get_exchange_rate(self, exchange):
+        base, quote = exchange.split('/')
+        # always a fresh quote: this call has been real time before fx_rates existed
+        rates = yield from self._fx([(base, quote)], max_age=0)
+        return rates.rate(base, quote)
+
+    def _stock_list_request(self, stockCountryId, offset=0, limit=1000):
+        stock_list_params = {
+            'stockCountryId': stockCountryId,
+            'offset': offset,
+            'isInUSGreenList': "false",
+            'limit': limit,
+            'requireTotal': "true",
+            'sortColumns': "name",
+            'sortTypes': "asc",
+            'intAccount': self.client_info.account_id,
+            'sessionId': self.session_id
+        }
+        return Request(DeGiroCore.__GET_STOCKS_URL, None, stock_list_params, error_message='Could not get stock list',
+                       schema='StockList')
+
+    def _stock_list_page(self, stockCountryId, offset=0, limit=1000):
+        page = yield self._stock_list_request(stockCountryId, offset, limit)
+        self._indexed(page['products'])
+        return page
+
+    @staticmethod
+    def _page_offsets(total, page_size, first_offset=0):
+        """Offsets of the pages still needed to read ``total`` rows after the page at ``first_offset``."""
+        return list(range(first_offset + page_size, total, page_size))
+
+    def _get_stock_list_by_country(self, stockCountryId, limit = None, page_size=1000, workers=1):
+        # the first page also tells how many rows there are in total
+        first_page = yield self._stock_list_request(stockCountryId, 0, page_size)
+        products = list(first_page['products'])
+        offsets = self._page_offsets(first_page['total'], page_size)
+
+        for i in range(0, len(offsets), workers):
+            if limit != None and len(products) > limit:
+                break
+            pages = yield [self._stock_list_request(stockCountryId, offset, page_size) for offset in offsets[i:i + workers]]
+            for page in pages:
+                if isinstance(page, Exception):
+                    raise page
+                products.extend(page['products'])
+
+        return self._indexed(products)
@@ -0,0 +1,71 @@
+import codecs
+
+
+class CSVStitcher:
+    """
+    Joins the bodies of consecutive CSV reports (e.g. one per date range) into one CSV,
+    fed chunk by chunk as they arrive. feed() and finish() return the complete records so
+    far, each a str ending in a newline (a quoted field may span lines); the header of
+    every part after the first is dropped when it repeats the first one.
+    """
+
+    def __init__(self):
+        self.header = None
+        self.records = 0
+        self.__decoder = None
+        self.__pending = ''
+        self.__partial = ''
+        self.__first = True
+
+    def start(self, encoding='utf-8'):
+        """Begins the next report, whose bytes are in encoding."""
+        if encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+            encoding = 'utf-8-sig'
+        self.__decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.__pending = ''
+        self.__partial = ''
+        self.__first = True
+
+    def feed(self, chunk, encoding='utf-8'):
+        """
+        Adds the next chunk (bytes, or str) of the current report, which begins with encoding
+        if start() was not called; returns the records it completed.
+        """
+        if self.__decoder is None:
+            self.start(encoding)
+        text = chunk if isinstance(chunk, str) else self.__decoder.decode(chunk)
+        return self.__split(self.__pending + text, final=False)
+
+    def finish(self):
+        """Ends the current report; returns its last records."""
+        tail = self.__decoder.decode(b'', final=True) if self.__decoder is not None else ''
+        records = self.__split(self.__pending + tail, final=True)
+        self.__decoder = None
+        return records
+
+    def __split(self, text, final):
+        lines = text.split('\n')
+        self.__pending = lines.pop()
+        records = []
+        partial = self.__partial
+        for line in lines:
+            partial += line + '\n'
+            if not partial.count('"') % 2:
+                records.append(partial)
+                partial = ''
+        if final and (partial or self.__pending):
+            records.append(partial + self.__pending + ('\n' if self.__pending else ''))
+            partial = self.__pending = ''
+        self.__partial = partial
+        return self.__keep(records)
+
+    def __keep(self, records):
+        if records and self.__first:
+            self.__first = False
+            records[0] = records[0].lstrip('\ufeff')
+            if self.header is None:
+                self.header = records[0]
+            elif records[0].strip() == self.header.strip():
+                records = records[1:]
+        self.records += len(records)
+        return records
@@ -2,3 +2,5 @@ class Data:
     class Type:
         PORTFOLIO = 'portfolio'
         CASHFUNDS = 'cashFunds'
+        ORDERS = 'orders'
+        TOTALPORTFOLIO = 'totalPortfolio'
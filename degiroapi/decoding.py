@@ -0,0 +1,77 @@
+import json
+
+BACKENDS = ('orjson', 'msgspec', 'json')
+
+
+class DecodeError(ValueError):
+    """A response body that is not valid JSON (or does not match its schema); ``body`` holds the start of it."""
+
+    def __init__(self, message, url=None, body=None):
+        super().__init__(message)
+        self.url = url
+        self.body = body
+
+
+class JSONDecoder:
+    """
+    Decodes response bodies straight from bytes with the fastest JSON library installed:
+    orjson, then msgspec, then the standard library. Pass backend to pick one.
+
+    typed=True (msgspec only) decodes the responses that name a schema in
+    degiroapi.schemas (stock lists, product info, transactions, update) directly into it:
+    values are type checked and fields that are not in the schema are left out.
+    """
+
+    def __init__(self, backend=None, typed=False):
+        if backend is None:
+            backend = next(name for name in BACKENDS if name == 'json' or _installed(name))
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown JSON backend {backend!r}, expected one of {BACKENDS}')
+        if typed and backend != 'msgspec':
+            raise ValueError('Typed decoding requires the msgspec backend')
+        self.backend = backend
+        self.typed = typed
+        self.__decoders = {}
+        if backend == 'orjson':
+            import orjson
+            self.__loads = orjson.loads
+            self.__errors = (orjson.JSONDecodeError,)
+        elif backend == 'msgspec':
+            import msgspec
+            self.__loads = msgspec.json.Decoder().decode
+            self.__errors = (msgspec.DecodeError,)
+        else:
+            self.__loads = json.loads
+            self.__errors = (ValueError,)
+
+    def __repr__(self):
+        return f'JSONDecoder({self.backend!r}, typed={self.typed})'
+
+    def __decoder(self, schema):
+        decode = self.__decoders.get(schema)
+        if decode is None:
+            import msgspec
+            from degiroapi import schemas
+            decode = self.__decoders[schema] = msgspec.json.Decoder(getattr(schemas, schema)).decode
+        return decode
+
+    def decode(self, body, schema=None, url=None):
+        """The decoded body (bytes or str); raises DecodeError if it is not valid JSON."""
+        try:
+            if self.typed and schema is not None:
+                return self.__decoder(schema)(body)
+            return self.__loads(body)
+        except self.__errors as e:
+            excerpt = body[:200]
+            raise DecodeError(f'Could not decode response{f" from {url}" if url else ""}: {e}', url, excerpt) from e
+
+
+def _installed(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+default_decoder = JSONDecoder()
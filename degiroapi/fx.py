@@ -0,0 +1,109 @@
+import threading
+import time
+
+from degiroapi.timeseries import _numpy
+
+
+class FXRates:
+    """
+    Exchange rates quoted by the vwd chart endpoint, kept by ``DeGiro.exchange_rates``.
+
+    A pair 'EUR/USD' is the number of USD one EUR buys. Pairs without a quote of their own
+    are derived from the quotes of both currencies against pivot, e.g. USD/CHF from EUR/USD
+    and EUR/CHF, so the client only has to fetch the pivot pairs. Quotes older than max_age
+    seconds are fetched again, all stale pairs in one chart request. pair_ids adds the
+    product ids of more pairs to PAIR_IDS.
+    """
+
+    PAIR_IDS = {
+        'EUR/USD': '705366',
+        'EUR/GBP': '714324',
+        'EUR/CHF': '714322',
+        'EUR/JPY': '1316472',
+        'GBP/USD': '1788982',
+    }
+
+    def __init__(self, max_age=60, pivot='EUR', pair_ids=None):
+        self.max_age = max_age
+        self.pivot = pivot
+        self.pair_ids = dict(self.PAIR_IDS, **(pair_ids or {}))
+        self.__quotes = {}
+        self.__lock = threading.Lock()
+
+    def __contains__(self, pair):
+        return pair in self.__quotes
+
+    def set(self, pair, rate, at=None):
+        """
+        Stores the quote of pair (fetched at timestamp at, now by default). A pair without an
+        entry in pair_ids cannot be fetched, so its quote is pinned: it never goes stale.
+        """
+        with self.__lock:
+            self.__quotes[pair] = (float(rate), time.time() if at is None else at)
+
+    def pairs(self, base, quote):
+        """The quoted pairs rate(base, quote) is computed from; raises KeyError if there is no way to."""
+        if base == quote:
+            return []
+        for pair in (f'{base}/{quote}', f'{quote}/{base}'):
+            if pair in self.pair_ids or pair in self.__quotes:
+                return [pair]
+        if self.pivot in (base, quote):
+            raise KeyError(f'No product id for {base}/{quote}, add it to pair_ids')
+        return self.pairs(base, self.pivot) + self.pairs(self.pivot, quote)
+
+    def stale(self, pairs, max_age=None):
+        """
+        The pairs among pairs to fetch: not quoted, or quoted longer than max_age (self.max_age
+        by default) ago, except pinned pairs. Raises KeyError for an unquoted pair without a
+        product id.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+        stale = []
+        with self.__lock:
+            for pair in dict.fromkeys(pairs):
+                quote = self.__quotes.get(pair)
+                if quote is not None and (pair not in self.pair_ids or now - quote[1] <= max_age):
+                    continue
+                if pair not in self.pair_ids:
+                    raise KeyError(f'No product id for {pair}, add it to pair_ids or set() its rate')
+                stale.append(pair)
+        return stale
+
+    def rate(self, base, quote):
+        """How much quote one base buys, from the stored quotes; raises KeyError if one is missing."""
+        if base == quote:
+            return 1.0
+        with self.__lock:
+            direct = self.__quotes.get(f'{base}/{quote}')
+            inverse = self.__quotes.get(f'{quote}/{base}')
+        if direct is not None:
+            return direct[0]
+        if inverse is not None:
+            return 1 / inverse[0]
+        if self.pivot in (base, quote):
+            raise KeyError(f'{base}/{quote} has not been quoted')
+        return self.rate(base, self.pivot) * self.rate(self.pivot, quote)
+
+    @staticmethod
+    def codes(currencies):
+        """The distinct currency codes in currencies (one code, or a sequence or array of them)."""
+        np = _numpy()
+        return np.unique(np.asarray(currencies, dtype=str)).tolist()
+
+    def convert(self, amounts, currencies, to='EUR'):
+        """
+        amounts (a number or an array) in currencies (one code, or one per amount) converted
+        to currency to, as a NumPy array. Each distinct currency is looked up once.
+        """
+        np = _numpy()
+        amounts = np.asarray(amounts, dtype=np.float64)
+        codes, inverse = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        factors = np.array([self.rate(code, to) for code in codes.tolist()], dtype=np.float64)
+        return amounts * factors[inverse].reshape(np.shape(currencies))
+
+    def quotes(self):
+        """{pair: (rate, timestamp)} of the stored quotes."""
+        with self.__lock:
+            return dict(self.__quotes)
@@ -0,0 +1,133 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+
+def endpoint_name(url):
+    """The url without query, ;jsessionid and ids, e.g. 'trader.degiro.nl/dgtbxdsservice/company-ratios/{id}'."""
+    parsed = urlparse(url)
+    path = parsed.path.split(';')[0]
+    segments = ['{id}' if re.search(r'\d', segment) and not re.fullmatch(r'v\d+', segment) else segment
+                for segment in path.split('/')]
+    return parsed.netloc + '/'.join(segments).rstrip('/')
+
+
+class Call:
+    """What happened to one request, as passed to the after and error hooks."""
+
+    def __init__(self, request):
+        self.request = request
+        self.endpoint = endpoint_name(request.url)
+        self.method = request.method
+        self.status_code = None
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.decode_elapsed = 0.0
+        self.attempts = 1
+        self.started = None
+
+    @property
+    def retries(self):
+        return self.attempts - 1
+
+
+class MetricsCollector:
+    """
+    Request hook that records per-endpoint call counts by status, latency histograms,
+    decode time, response bytes, retries and errors.
+
+    Add it to a client's hooks (``degiro.hooks.append(collector)``) and read it back
+    with ``as_dict()`` or, for a Prometheus scrape, ``prometheus()``.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+
+    def __endpoint(self, endpoint):
+        metrics = self.__endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.__endpoints[endpoint] = {
+                'calls': 0, 'statuses': {}, 'errors': {}, 'bytes': 0, 'retries': 0,
+                'latency_buckets': [0] * len(self.buckets), 'latency_sum': 0.0,
+                'decode_sum': 0.0,
+            }
+        return metrics
+
+    def __record(self, call):
+        metrics = self.__endpoint(call.endpoint)
+        metrics['calls'] += 1
+        status = str(call.status_code) if call.status_code is not None else 'none'
+        metrics['statuses'][status] = metrics['statuses'].get(status, 0) + 1
+        metrics['bytes'] += call.bytes
+        metrics['retries'] += call.retries
+        metrics['latency_sum'] += call.elapsed
+        metrics['decode_sum'] += call.decode_elapsed
+        for n, bound in enumerate(self.buckets):
+            if call.elapsed <= bound:
+                metrics['latency_buckets'][n] += 1
+                break
+        return metrics
+
+    def after(self, call):
+        with self.__lock:
+            self.__record(call)
+
+    def error(self, call, exception):
+        with self.__lock:
+            metrics = self.__record(call) if call.status_code is None else self.__endpoint(call.endpoint)
+            name = type(exception).__name__
+            metrics['errors'][name] = metrics['errors'].get(name, 0) + 1
+
+    def reset(self):
+        with self.__lock:
+            self.__endpoints.clear()
+
+    def as_dict(self):
+        """Per endpoint: calls, statuses, errors, bytes, retries, latency_sum, decode_sum and cumulative latency buckets."""
+        with self.__lock:
+            result = {}
+            for endpoint, metrics in self.__endpoints.items():
+                cumulative = []
+                total = 0
+                for count in metrics['latency_buckets']:
+                    total += count
+                    cumulative.append(total)
+                result[endpoint] = dict(metrics, statuses=dict(metrics['statuses']), errors=dict(metrics['errors']),
+                                        latency_buckets=dict(zip(self.buckets, cumulative)))
+            return result
+
+    def prometheus(self, prefix='degiroapi'):
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            f'# HELP {prefix}_requests_total Requests by endpoint and status code.',
+            f'# TYPE {prefix}_requests_total counter',
+        ]
+        data = self.as_dict()
+        for endpoint, metrics in data.items():
+            for status, count in metrics['statuses'].items():
+                lines.append(f'{prefix}_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        lines += [f'# HELP {prefix}_request_duration_seconds Time until the response body was read.',
+                  f'# TYPE {prefix}_request_duration_seconds histogram']
+        for endpoint, metrics in data.items():
+            for bound, count in metrics['latency_buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{endpoint}"}} {metrics["latency_sum"]}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{endpoint}"}} {metrics["calls"]}')
+        for name, key, kind, help_text in (
+                ('decode_duration_seconds_total', 'decode_sum', 'counter', 'Time spent decoding response bodies.'),
+                ('response_bytes_total', 'bytes', 'counter', 'Response body bytes received.'),
+                ('retries_total', 'retries', 'counter', 'Requests sent again by the transport.')):
+            lines += [f'# HELP {prefix}_{name} {help_text}', f'# TYPE {prefix}_{name} {kind}']
+            for endpoint, metrics in data.items():
+                lines.append(f'{prefix}_{name}{{endpoint="{endpoint}"}} {metrics[key]}')
+        lines += [f'# HELP {prefix}_errors_total Requests that raised, by exception type.',
+                  f'# TYPE {prefix}_errors_total counter']
+        for endpoint, metrics in data.items():
+            for error, count in metrics['errors'].items():
+                lines.append(f'{prefix}_errors_total{{endpoint="{endpoint}",error="{error}"}} {count}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,148 @@
+from datetime import date, datetime
+
+
+def field(key, parse=None, slot=None):
+    """
+    Read-only attribute for raw[key]. With parse, the value is converted on first access and
+    kept in slot (which the class must list in __slots__); missing values are None.
+    """
+    if parse is None:
+        return property(lambda self: self._get(key), doc=f'raw {key!r}')
+
+    def get(self):
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            value = self._get(key)
+            value = parse(value) if value is not None else None
+            setattr(self, slot, value)
+            return value
+    return property(get, doc=f'raw {key!r}, parsed by {parse.__name__}')
+
+
+def parse_date(value):
+    return date.fromisoformat(value[:10])
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value)
+
+
+class Model:
+    """
+    Slotted view of a raw API payload. Fields are read from the payload (and parsed, where
+    needed) when they are first accessed; ``raw`` is the payload itself.
+    """
+    __slots__ = ('_raw',)
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def _get(self, key):
+        return self._raw.get(key)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self._raw!r})'
+
+
+class _ValueListModel(Model):
+    """Model for the name/value rows of the update endpoint (positions, orders), flattened on first access."""
+    __slots__ = ('_fields', '_index')
+
+    @classmethod
+    def from_list(cls, items):
+        """
+        Wraps many rows at once. Rows of one response list their fields in the same order, so
+        the position of each name is looked up once, in the first row, and shared by all of them:
+        a field is then read straight from its row instead of flattening every row into a dict.
+        """
+        items = list(items)
+        values = items[0].get('value') if items else None
+        index = {item.get('name'): i for i, item in enumerate(values)} if isinstance(values, list) else None
+        models = []
+        for item in items:
+            model = cls(item)
+            model._index = index
+            models.append(model)
+        return models
+
+    def _get(self, key):
+        index = getattr(self, '_index', None)
+        if index is not None and key in index:
+            values = self._raw.get('value')
+            i = index[key]
+            # a row that differs from the first one is flattened like any other
+            if isinstance(values, list) and i < len(values) and values[i].get('name') == key:
+                return values[i].get('value')
+        try:
+            fields = self._fields
+        except AttributeError:
+            raw = self._raw
+            values = raw.get('value')
+            if isinstance(values, list):
+                fields = {i['name']: i.get('value') for i in values}
+                fields.setdefault('id', raw.get('id'))
+            else:
+                fields = raw
+            self._fields = fields
+        return fields.get(key)
+
+
+class Position(_ValueListModel):
+    """A portfolio position, from a positionrow of getdata(Data.Type.PORTFOLIO) or sync()."""
+    __slots__ = ()
+
+    id = field('id')
+    position_type = field('positionType')
+    size = field('size')
+    price = field('price')
+    value = field('value')
+    break_even_price = field('breakEvenPrice')
+    realized_product_pl = field('realizedProductPl')
+
+    @classmethod
+    def from_update(cls, portfolio):
+        """Positions of the portfolio block of an update response."""
+        return cls.from_list(portfolio['portfolio']['value'])
+
+
+class OrderRecord(_ValueListModel):
+    """An order, from orders()/orders_range() (order history) or from the orders of the update endpoint."""
+    __slots__ = ('_created', '_date')
+
+    product_id = field('productId')
+    buysell = field('buysell')
+    size = field('size')
+    quantity = field('quantity')
+    price = field('price')
+    stop_price = field('stopPrice')
+    order_type = field('orderTypeId')
+    time_type = field('orderTimeTypeId')
+    status = field('status')
+    is_active = field('isActive')
+    created = field('created', parse_datetime, '_created')
+    date = field('date', parse_datetime, '_date')
+
+    @property
+    def order_id(self):
+        return self._get('orderId') or self._get('id')
+
+
+class Transaction(Model):
+    """A transaction, from transactions() or a TransactionStore."""
+    __slots__ = ('_date',)
+
+    id = field('id')
+    product_id = field('productId')
+    buysell = field('buysell')
+    price = field('price')
+    quantity = field('quantity')
+    total = field('total')
+    fx_rate = field('fxRate')
+    total_in_base_currency = field('totalInBaseCurrency')
+    fee_in_base_currency = field('feeInBaseCurrency')
+    date = field('date', parse_datetime, '_date')
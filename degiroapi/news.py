@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+
+class NewsTracker:
+    """
+    State of ``DeGiro.poll_news``: the newest news item seen per ISIN, so a poll only pages
+    back until it reaches items it has seen, and the keys of the last max_seen stories, so a
+    story about several companies is yielded once. An item's key is its id (or its title
+    and date when it has none).
+    """
+
+    def __init__(self, max_seen=100000):
+        self.max_seen = max_seen
+        self.__newest = {}
+        self.__seen = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(item):
+        return item.get('id') or (item.get('title'), item.get('date'))
+
+    def newest(self, isin):
+        """(date, key) of the newest item seen for isin, or None before its first poll."""
+        return self.__newest.get(isin)
+
+    def known(self, isin, item):
+        """Whether item is not newer than the newest item seen for isin."""
+        newest = self.__newest.get(isin)
+        if newest is None:
+            return False
+        date = item.get('date') or ''
+        return date < newest[0] or (date == newest[0] and self.key(item) in self.__seen)
+
+    def update(self, isin, items):
+        """Records items (fetched for isin, newest first) as seen for isin."""
+        if not items:
+            return
+        with self.__lock:
+            newest = max(((item.get('date') or '', self.key(item)) for item in items), key=lambda pair: pair[0])
+            if isin not in self.__newest or newest[0] >= self.__newest[isin][0]:
+                self.__newest[isin] = newest
+            for item in items:
+                self.__remember(self.key(item), False)
+
+    def __remember(self, key, yielded):
+        self.__seen[key] = yielded or self.__seen.get(key, False)
+        self.__seen.move_to_end(key)
+        while len(self.__seen) > self.max_seen:
+            self.__seen.popitem(last=False)
+
+    def unseen(self, items):
+        """The items not yielded before (by key), now marked as yielded."""
+        unseen = []
+        with self.__lock:
+            for item in items:
+                key = self.key(item)
+                if not self.__seen.get(key):
+                    self.__remember(key, True)
+                    unseen.append(item)
+        return unseen
@@ -0,0 +1,104 @@
+import bisect
+import re
+from datetime import date, datetime
+
+CALL = 'call'
+PUT = 'put'
+
+
+def parse_expiry(value):
+    """The date of an option expirationDate, which comes as '17-3-2023' (or ISO '2023-03-17')."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    day, month, year = value[:10].split('-')
+    if len(day) == 4:
+        day, year = year, day
+    return date(int(year), int(month), int(day))
+
+
+def option_side(product):
+    """CALL or PUT, from putCall ('C' / 'P') or else the name, e.g. 'ASML C500.00 17MAR23'."""
+    side = product.get('putCall') or product.get('optionType')
+    if not side:
+        match = re.search(r'\s([CP])\s?\d', product.get('name', ''))
+        side = match.group(1) if match else None
+    if not side:
+        return None
+    return CALL if side.upper().startswith('C') else PUT
+
+
+class OptionChain:
+    """
+    The options on one underlying (as option_table returns them), indexed by expiry date,
+    strike and side (CALL or PUT). ``expiries`` are sorted, and so are the strikes of each
+    expiry, so the nearest strike to a price is a binary search.
+    """
+
+    def __init__(self, products, isin=None):
+        self.isin = isin
+        self.products = list(products)
+        self.__index = {}
+        for product in self.products:
+            if product.get('expirationDate') is None or product.get('strikePrice') is None:
+                continue
+            key = (parse_expiry(product['expirationDate']), float(product['strikePrice']), option_side(product))
+            self.__index[key] = product
+        strikes = {}
+        for expiry, strike, side in self.__index:
+            strikes.setdefault(expiry, set()).add(strike)
+            strikes.setdefault((expiry, side), set()).add(strike)
+        # sorted strikes by expiry and by (expiry, side)
+        self.__strikes = {key: sorted(values) for key, values in strikes.items()}
+        self.expiries = sorted(key for key in self.__strikes if isinstance(key, date))
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __repr__(self):
+        return f'OptionChain({self.isin!r}, {len(self.products)} options, {len(self.expiries)} expiries)'
+
+    def strikes(self, expiry=None):
+        """The sorted strikes of expiry, or of all expiries."""
+        if expiry is None:
+            return sorted({strike for strikes in self.__strikes.values() for strike in strikes})
+        return self.__strikes.get(parse_expiry(expiry), [])
+
+    def get(self, expiry, strike, side=CALL):
+        """The option with exactly this expiry, strike and side, or None."""
+        return self.__index.get((parse_expiry(expiry), float(strike), side))
+
+    def expiry(self, expiry):
+        """{strike: {CALL: option, PUT: option}} of expiry, in strike order."""
+        expiry = parse_expiry(expiry)
+        return {strike: {side: self.__index[expiry, strike, side] for side in (CALL, PUT)
+                         if (expiry, strike, side) in self.__index}
+                for strike in self.__strikes.get(expiry, [])}
+
+    def nearest_expiry(self, day=None):
+        """The first expiry on or after day (today by default), or None."""
+        day = parse_expiry(day) if day is not None else date.today()
+        i = bisect.bisect_left(self.expiries, day)
+        return self.expiries[i] if i < len(self.expiries) else None
+
+    def nearest_strike(self, price, expiry=None, side=None):
+        """The strike of expiry (or of any expiry), and of side if given, closest to price; None without strikes."""
+        if side is not None and expiry is not None:
+            strikes = self.__strikes.get((parse_expiry(expiry), side), [])
+        elif side is not None:
+            strikes = sorted({strike for expiry in self.expiries for strike in self.__strikes.get((expiry, side), [])})
+        else:
+            strikes = self.strikes(expiry)
+        if not strikes:
+            return None
+        i = bisect.bisect_left(strikes, price)
+        return min(strikes[max(0, i - 1):i + 1], key=lambda strike: abs(strike - price))
+
+    def nearest(self, price, expiry, side=CALL):
+        """The option of expiry and side whose strike is closest to price, or None."""
+        strike = self.nearest_strike(price, expiry, side)
+        return self.get(expiry, strike, side) if strike is not None else None
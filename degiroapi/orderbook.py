@@ -0,0 +1,71 @@
+from degiroapi.datatypes import Data
+
+
+class OrderBook:
+    """
+    Local index of orders keyed by orderId.
+
+    It is loaded once from the order history and then kept current with the orders feed of
+    the update endpoint through an AccountState (the client's account_state, attached by
+    ``DeGiro.refresh_order_book``): the rows and the lastUpdated token of that feed live
+    there, so ``DeGiro.sync`` keeps the book current too. Entries have the shape of the order
+    history rows (``orderId``, ``isActive``, ``buysell``, ``productId``, ...).
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.loaded = False
+        self.__state = None
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, orderId):
+        return orderId in self.orders
+
+    @property
+    def last_updated(self):
+        """The lastUpdated token of the orders feed, kept by the attached AccountState."""
+        return self.__state.tokens.get(Data.Type.ORDERS) if self.__state is not None else None
+
+    def get(self, orderId):
+        return self.orders.get(orderId)
+
+    def load(self, history):
+        """
+        Indexes order history rows; when an orderId occurs more than once the last row wins.
+        Orders already known from the orders feed keep the (newer) feed values.
+        """
+        for order in history:
+            self.orders[order['orderId']] = dict(order, **self.orders.get(order['orderId'], {}))
+        self.loaded = True
+
+    def attach(self, state):
+        """Follows the orders of an AccountState: its current rows now, its changes from then on."""
+        if state is self.__state:
+            return
+        if self.__state is not None:
+            self.__state.unsubscribe(self.apply)
+        self.__state = state
+        state.subscribe(self.apply)
+        for row_id, row in state.data.get(Data.Type.ORDERS, {}).items():
+            self.__update(row_id, row)
+
+    def apply(self, change):
+        """Merges an AccountState Change of the orders feed into the index (other changes are ignored)."""
+        if change.datatype != Data.Type.ORDERS:
+            return
+        if change.kind == 'removed':
+            if change.id in self.orders:
+                self.orders[change.id] = dict(self.orders[change.id], isActive=False)
+        else:
+            self.__update(change.id, change.new)
+
+    def __update(self, row_id, row):
+        fields = dict(row)
+        fields['orderId'] = fields.pop('id', row_id)
+        fields['isActive'] = True
+        self.orders[fields['orderId']] = dict(self.orders.get(fields['orderId'], {}), **fields)
+
+    def active(self):
+        return [order for order in self.orders.values() if order.get('isActive')]
@@ -0,0 +1,73 @@
+DEFAULT_FIELDS = ('positionType', 'size', 'price', 'value', 'breakEvenPrice')
+
+
+def parse_portfolio(portfolio, fields=DEFAULT_FIELDS, filter_zero=None, columnar=False):
+    """
+    Turns the portfolio block of an update response into one entry per position in a single pass.
+
+    fields: the position fields to keep (besides 'id'), None for every field that occurs.
+    filter_zero: leave out positions with size 0.
+    columnar: False for a list of row dicts, True for a dict of lists (one per field),
+    'numpy' for a dict of NumPy arrays (numeric columns as float64 with NaN for missing values).
+    """
+    items = portfolio['portfolio']['value']
+    if fields is None:
+        fields = list(dict.fromkeys(i['name'] for item in items for i in item['value'] if i['name'] != 'id'))
+    if columnar:
+        columns = _parse_columns(items, fields, filter_zero)
+        return _to_arrays(columns) if columnar == 'numpy' else columns
+    return _parse_rows(items, fields, filter_zero)
+
+
+def _parse_rows(items, fields, filter_zero):
+    template = dict.fromkeys(fields)
+    wanted = frozenset(fields) | ({'size'} if filter_zero else frozenset())
+    rows = []
+    for item in items:
+        row = {'id': item['id']}
+        row.update(template)
+        for i in item['value']:
+            name = i['name']
+            if name in wanted:
+                row[name] = i['value']
+        rows.append(row)
+    if filter_zero:
+        rows = [row for row in rows if row.get('size') != 0.0]
+        if 'size' not in template:
+            for row in rows:
+                row.pop('size', None)
+    return rows
+
+
+def _parse_columns(items, fields, filter_zero):
+    count = len(items)
+    columns = {field: [None] * count for field in fields}
+    sizes = columns['size'] if 'size' in columns else [None] * count
+    lookup = dict(columns, size=sizes)
+    for n, item in enumerate(items):
+        for i in item['value']:
+            column = lookup.get(i['name'])
+            if column is not None:
+                column[n] = i['value']
+    ids = [item['id'] for item in items]
+    if filter_zero:
+        keep = [n for n, size in enumerate(sizes) if size != 0.0]
+        ids = [ids[n] for n in keep]
+        columns = {field: [column[n] for n in keep] for field, column in columns.items()}
+    return dict(id=ids, **columns)
+
+
+def _to_arrays(columns):
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("columnar='numpy' requires numpy, install it with: pip install numpy")
+    arrays = {}
+    for name, column in columns.items():
+        try:
+            if any(isinstance(v, str) for v in column):
+                raise ValueError(name)
+            arrays[name] = np.array(column, dtype=np.float64)
+        except (ValueError, TypeError):
+            arrays[name] = np.array(column, dtype=object)
+    return arrays
@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+
+from degiroapi.timeseries import COLUMNS, _numpy, period_seconds, period_start
+
+
+class PriceStore:
+    """
+    Local SQLite copy of price history, filled by ``DeGiro.price_history``.
+
+    Bars are stored once per product, resolution, series type ('price' or 'ohlc') and time.
+    For each of those the store remembers when it was last fetched, how far back it was asked
+    for and the first bar of the history it holds without gaps, so a refresh only asks the vwd
+    chart endpoint for the shortest period that covers the time since the last fetch. The last
+    bar is replaced on every refresh, it may have been incomplete.
+    Use ``path=':memory:'`` (the default) for a store that only lives in this process.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS bars (series TEXT, time INTEGER, open REAL, high REAL, '
+                              'low REAL, close REAL, PRIMARY KEY (series, time)) WITHOUT ROWID')
+            self.__db.execute('CREATE TABLE IF NOT EXISTS coverage '
+                              '(series TEXT PRIMARY KEY, since INTEGER, requested REAL, fetched REAL)')
+
+    def __len__(self):
+        with self.__lock:
+            return self.__db.execute('SELECT COUNT(*) FROM bars').fetchone()[0]
+
+    @staticmethod
+    def key(product_id, resolution, _type='price'):
+        return f'{product_id}/{resolution}/{_type}'
+
+    def coverage(self, product_id, resolution, _type='price'):
+        """
+        (since, last, requested, fetched): the history is complete from the bar at since to the
+        bar at last (series times in epoch seconds, None without bars), it was asked for from
+        requested on and last fetched at fetched (timestamps). None if nothing was fetched yet.
+        """
+        key = self.key(product_id, resolution, _type)
+        with self.__lock:
+            row = self.__db.execute('SELECT since, requested, fetched FROM coverage WHERE series = ?',
+                                    (key,)).fetchone()
+            if row is None:
+                return None
+            last = self.__db.execute('SELECT MAX(time) FROM bars WHERE series = ?', (key,)).fetchone()[0]
+        return row[0], last, row[1], row[2]
+
+    def add(self, product_id, resolution, _type, arrays, requested, fetched):
+        """
+        Stores the bars of a parse_series result asked for from requested until fetched
+        (timestamps), replacing bars at the same times. Only the returned bars count as covered,
+        the endpoint may have sent fewer than the period holds. Returns how many bars were new.
+        """
+        key = self.key(product_id, resolution, _type)
+        step = period_seconds(resolution)
+        np = _numpy()
+        times = arrays['time'].astype('datetime64[s]').astype(np.int64).tolist()
+        if 'price' in arrays:
+            rows = zip([key] * len(times), times, arrays['price'].tolist())
+            insert = 'INSERT OR REPLACE INTO bars (series, time, close) VALUES (?, ?, ?)'
+        else:
+            rows = zip([key] * len(times), times, *(arrays[name].tolist() for name in COLUMNS[5]))
+            insert = 'INSERT OR REPLACE INTO bars (series, time, open, high, low, close) VALUES (?, ?, ?, ?, ?, ?)'
+        with self.__lock, self.__db:
+            before, last = self.__db.execute('SELECT COUNT(*), MAX(time) FROM bars WHERE series = ?',
+                                             (key,)).fetchone()
+            self.__db.executemany(insert, rows)
+            row = self.__db.execute('SELECT since, requested, fetched FROM coverage WHERE series = ?',
+                                    (key,)).fetchone()
+            since = times[0] if times else None
+            if row is not None and row[0] is not None:
+                if since is None:
+                    since, requested = row[0], min(requested, row[1])
+                # the held history only grows backwards if the new bars reach the held ones without a gap
+                elif since <= last + step:
+                    since, requested = min(since, row[0]), min(requested, row[1])
+            self.__db.execute('INSERT OR REPLACE INTO coverage (series, since, requested, fetched) '
+                              'VALUES (?, ?, ?, ?)', (key, since, requested, max(fetched, row[2]) if row else fetched))
+            return self.__db.execute('SELECT COUNT(*) FROM bars WHERE series = ?', (key,)).fetchone()[0] - before
+
+    def query(self, product_id, resolution, _type='price', period=None, start=None, end=None):
+        """
+        The stored bars as a parse_series result, optionally only those of the last period
+        (e.g. 'P1Y', counted back from the last bar) and/or between start and end (inclusive).
+        """
+        np = _numpy()
+        conditions = ['series = ?']
+        args = [self.key(product_id, resolution, _type)]
+        if period is not None:
+            with self.__lock:
+                last = self.__db.execute('SELECT MAX(time) FROM bars WHERE series = ?', args).fetchone()[0]
+            if last is not None:
+                conditions.append('time >= ?')
+                args.append(int(period_start(np.datetime64(last, 's'), period).astype(np.int64)))
+        for condition, value in (('time >= ?', start), ('time <= ?', end)):
+            if value is not None:
+                conditions.append(condition)
+                args.append(int(np.datetime64(value, 's').astype(np.int64)))
+        columns = COLUMNS[5] if _type == 'ohlc' else ('close',)
+        with self.__lock:
+            rows = self.__db.execute(f'SELECT time, {", ".join(columns)} FROM bars WHERE {" AND ".join(conditions)} '
+                                     'ORDER BY time', args).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns) + 1)
+        arrays = {'time': data[:, 0].astype(np.int64).astype('datetime64[s]')}
+        for n, name in enumerate(COLUMNS[5] if _type == 'ohlc' else COLUMNS[2], 1):
+            arrays[name] = np.ascontiguousarray(data[:, n])
+        return arrays
+
+    def close(self):
+        self.__db.close()
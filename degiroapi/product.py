@@ -1,54 +1,18 @@
-from datetime import datetime
+from degiroapi.models import Model, field, parse_date
 
 
-class Product:
-    def __init__(self, product):
-        self.__id = product['id']
-        self.__name = product['name']
-        self.__isin = product['isin']
-        self.__symbol = product['symbol']
-        self.__currency = product['currency']
-        self.__product_type = product['productTypeId']
-        self.__tradable = product['tradable']
-        self.__close_price = product.get('closePrice')
-        close_price_date = product.get('closePriceDate')
-        self.__close_price_date = datetime.strptime(close_price_date, '%Y-%m-%d').date() if close_price_date else None
+class Product(Model):
+    __slots__ = ('_close_price_date',)
 
-    @property
-    def id(self):
-        return self.__id
-
-    @property
-    def name(self):
-        return self.__name
-
-    @property
-    def isin(self):
-        return self.__isin
-
-    @property
-    def symbol(self):
-        return self.__symbol
-
-    @property
-    def currency(self):
-        return self.__currency
-
-    @property
-    def product_type(self):
-        return self.__product_type
-
-    @property
-    def tradable(self):
-        return self.__tradable
-
-    @property
-    def close_price(self):
-        return self.__close_price
-
-    @property
-    def close_price_date(self):
-        return self.__close_price_date
+    id = field('id')
+    name = field('name')
+    isin = field('isin')
+    symbol = field('symbol')
+    currency = field('currency')
+    product_type = field('productTypeId')
+    tradable = field('tradable')
+    close_price = field('closePrice')
+    close_price_date = field('closePriceDate', parse_date, '_close_price_date')
 
     @property
     def is_option(self):  # stock option?
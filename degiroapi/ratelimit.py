@@ -0,0 +1,152 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from urllib.parse import urlparse
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+
+def endpoint_family(url):
+    """The rate limit family of a DeGiro url: trading, reporting, product_search, dgtbxdsservice, charting or other."""
+    parsed = urlparse(url)
+    if 'vwdservices' in parsed.netloc:
+        return 'charting'
+    segment = parsed.path.strip('/').split('/')[0]
+    if segment == 'products_s':
+        return 'product_search'
+    if segment in ('trading', 'reporting', 'product_search', 'dgtbxdsservice'):
+        return segment
+    return 'other'
+
+
+def request_priority(request, family):
+    """Explicit request priority if set, else HIGH for login and trading actions (order placement, modification, deletion)."""
+    if request.priority is not None:
+        return request.priority
+    if family == 'other' and request.method == 'POST':
+        return HIGH
+    if family == 'trading' and request.method != 'GET':
+        return HIGH
+    return NORMAL
+
+
+class _Bucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.waiters = []
+        self.acquired = 0
+        self.waited = 0.0
+        self.max_depth = 0
+
+    def refill(self):
+        current = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (current - self.updated) * self.rate)
+        self.updated = current
+
+    def try_take(self, ticket):
+        """Takes a token for ticket if it is first in line; otherwise returns how long to wait."""
+        self.refill()
+        if self.waiters[0] == ticket and self.tokens >= 1:
+            heapq.heappop(self.waiters)
+            self.tokens -= 1
+            self.acquired += 1
+            return 0
+        return max((1 - self.tokens) / self.rate, 0.001)
+
+
+class RateLimiter:
+    """
+    Token buckets per endpoint family, shared by every request of a client (or of several
+    clients, when the same limiter is assigned to them).
+
+    rates maps a family to (requests per second, burst size); families that are not in it
+    use default. A request waits until its family has a token; waiting requests are served
+    by priority (HIGH, NORMAL, LOW) and then in arrival order, so order placement and
+    cancellation go before queued bulk data requests.
+    """
+
+    DEFAULT_RATES = {
+        'trading': (10, 10),
+        'reporting': (5, 5),
+        'product_search': (10, 20),
+        'dgtbxdsservice': (5, 10),
+        'charting': (20, 40),
+    }
+
+    def __init__(self, rates=None, default=(5, 5)):
+        self.rates = dict(self.DEFAULT_RATES, **(rates or {}))
+        self.default = default
+        self.__buckets = {}
+        self.__counter = itertools.count()
+        self.__lock = threading.Condition()
+
+    def __bucket(self, family):
+        bucket = self.__buckets.get(family)
+        if bucket is None:
+            bucket = self.__buckets[family] = _Bucket(*self.rates.get(family, self.default))
+        return bucket
+
+    def __enqueue(self, request):
+        family = endpoint_family(request.url)
+        bucket = self.__bucket(family)
+        ticket = (request_priority(request, family), next(self.__counter))
+        heapq.heappush(bucket.waiters, ticket)
+        bucket.max_depth = max(bucket.max_depth, len(bucket.waiters))
+        return bucket, ticket
+
+    def __withdraw(self, bucket, ticket):
+        # a waiter that gives up must not stay at the head of the queue and block the ones behind it
+        if ticket in bucket.waiters:
+            bucket.waiters.remove(ticket)
+            heapq.heapify(bucket.waiters)
+            self.__lock.notify_all()
+
+    def acquire(self, request):
+        """Blocks until the request may be sent."""
+        started = time.monotonic()
+        with self.__lock:
+            bucket, ticket = self.__enqueue(request)
+            try:
+                while True:
+                    delay = bucket.try_take(ticket)
+                    if not delay:
+                        bucket.waited += time.monotonic() - started
+                        self.__lock.notify_all()
+                        return
+                    self.__lock.wait(delay)
+            except BaseException:
+                self.__withdraw(bucket, ticket)
+                raise
+
+    async def acquire_async(self, request):
+        """Waits, without blocking the event loop, until the request may be sent."""
+        started = time.monotonic()
+        with self.__lock:
+            bucket, ticket = self.__enqueue(request)
+        try:
+            while True:
+                with self.__lock:
+                    delay = bucket.try_take(ticket)
+                    if not delay:
+                        bucket.waited += time.monotonic() - started
+                        self.__lock.notify_all()
+                        return
+                await asyncio.sleep(delay)
+        except BaseException:
+            with self.__lock:
+                self.__withdraw(bucket, ticket)
+            raise
+
+    def stats(self):
+        """Per family: current queue depth, maximum queue depth, requests let through and total seconds waited."""
+        with self.__lock:
+            return {family: {'queue_depth': len(bucket.waiters), 'max_queue_depth': bucket.max_depth,
+                             'acquired': bucket.acquired, 'waited': bucket.waited}
+                    for family, bucket in self.__buckets.items()}
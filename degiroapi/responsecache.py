@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+from degiroapi.core import encode_params
+
+
+class CachedResponse:
+    """A stored response body with its validators; ``fresh`` within ttl, ``servable`` until stale_while_revalidate after that."""
+
+    def __init__(self, key, body, etag, last_modified, stored, ttl, stale_while_revalidate):
+        self.key = key
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = stored
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+
+    @property
+    def age(self):
+        return time.time() - self.stored
+
+    @property
+    def fresh(self):
+        return self.age < self.ttl
+
+    @property
+    def servable(self):
+        return self.age < self.ttl + self.stale_while_revalidate
+
+
+class ResponseCache:
+    """
+    HTTP response cache for the requests that name a cache (company_ratios, company_profile,
+    financials and news), keyed by method, url and params without the session id.
+
+    ttls maps those names to seconds a response is fresh (default_ttl for the others). Once
+    it is older, the request is sent again with If-None-Match / If-Modified-Since when the
+    server gave an ETag / Last-Modified, and a 304 answer renews the stored body. For up to
+    stale_while_revalidate seconds after expiry the stale body is returned at once while it
+    is revalidated in the background. Bodies are kept in SQLite (``path=':memory:'``, the
+    default, keeps them in this process only); the least recently used are dropped once
+    they take more than max_bytes.
+    """
+
+    DEFAULT_TTLS = {
+        'company_ratios': 24 * 60 * 60,
+        'company_profile': 24 * 60 * 60,
+        'financials': 24 * 60 * 60,
+        'news': 15 * 60,
+    }
+
+    def __init__(self, path=':memory:', max_bytes=50 * 1024 * 1024, ttls=None, default_ttl=60 * 60,
+                 stale_while_revalidate=60 * 60):
+        self.max_bytes = max_bytes
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.__revalidating = set()
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body BLOB, etag TEXT, '
+                              'last_modified TEXT, stored REAL, used REAL, size INTEGER)')
+            self.__db.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+            self.__bytes = self.__db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def __len__(self):
+        with self.__lock:
+            return self.__db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def key(request):
+        params = [(k, v) for k, v in encode_params(request.params) or [] if k != 'sessionId']
+        return f'{request.method} {request.url}?{urlencode(sorted(params))}'
+
+    def ttl(self, request):
+        return self.ttls.get(request.cache, self.default_ttl)
+
+    def lookup(self, request):
+        """The CachedResponse stored for request, or None. Counts a hit, stale hit or miss."""
+        key = self.key(request)
+        with self.__lock, self.__db:
+            row = self.__db.execute('SELECT body, etag, last_modified, stored FROM responses WHERE key = ?',
+                                    (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.__db.execute('UPDATE responses SET used = ? WHERE key = ?', (time.time(), key))
+        cached = CachedResponse(key, *row, self.ttl(request), self.stale_while_revalidate)
+        if cached.fresh:
+            self.hits += 1
+        elif cached.servable:
+            self.stale_hits += 1
+        else:
+            self.misses += 1
+        return cached
+
+    def conditional(self, request, cached):
+        """A copy of request that revalidates cached: with its validators as If-None-Match / If-Modified-Since."""
+        request = request.renewed({})
+        request.cached = cached
+        request.headers = dict(request.headers or {})
+        if cached.etag:
+            request.headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            request.headers['If-Modified-Since'] = cached.last_modified
+        return request
+
+    def begin_revalidation(self, cached):
+        """False if cached is already being revalidated in the background, else marks it as such."""
+        with self.__lock:
+            if cached.key in self.__revalidating:
+                return False
+            self.__revalidating.add(cached.key)
+            return True
+
+    def end_revalidation(self, cached):
+        with self.__lock:
+            self.__revalidating.discard(cached.key)
+
+    def update(self, request, status_code, body):
+        """
+        Renews the body a 304 response to request confirmed. Returns the (status code, body)
+        to decode: the cached body with status 200 for a 304.
+        """
+        cached = request.cached
+        if status_code == 304 and cached is not None:
+            headers = getattr(request, 'response_headers', None) or {}
+            with self.__lock, self.__db:
+                self.__db.execute('UPDATE responses SET stored = ?, etag = COALESCE(?, etag), '
+                                  'last_modified = COALESCE(?, last_modified) WHERE key = ?',
+                                  (time.time(), headers.get('ETag'), headers.get('Last-Modified'), cached.key))
+                self.revalidated += 1
+            return 200, cached.body
+        return status_code, body
+
+    def store(self, request, body):
+        """
+        Stores the body of a 200 response to request. Called once the body decoded, so a
+        truncated or non-JSON answer (a maintenance page, say) is never served from the cache.
+        """
+        headers = getattr(request, 'response_headers', None) or {}
+        if 'no-store' not in headers.get('Cache-Control', ''):
+            self.__store(self.key(request), body, headers.get('ETag'), headers.get('Last-Modified'))
+
+    def __store(self, key, body, etag, last_modified):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        stored = time.time()
+        with self.__lock, self.__db:
+            row = self.__db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self.__db.execute('INSERT OR REPLACE INTO responses (key, body, etag, last_modified, stored, used, size) '
+                              'VALUES (?, ?, ?, ?, ?, ?, ?)', (key, body, etag, last_modified, stored, stored, size))
+            self.__bytes += size - (row[0] if row else 0)
+            while self.__bytes > self.max_bytes:
+                oldest = self.__db.execute('SELECT key, size FROM responses ORDER BY used LIMIT 100').fetchall()
+                for old_key, old_size in oldest:
+                    self.__db.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                    self.__bytes -= old_size
+                    if self.__bytes <= self.max_bytes:
+                        break
+
+    def clear(self):
+        with self.__lock, self.__db:
+            self.__db.execute('DELETE FROM responses')
+            self.__bytes = 0
+            self.hits = self.stale_hits = self.misses = self.revalidated = 0
+
+    def stats(self):
+        return {'size': len(self), 'bytes': self.__bytes, 'hits': self.hits, 'stale_hits': self.stale_hits,
+                'misses': self.misses, 'revalidated': self.revalidated}
+
+    def close(self):
+        self.__db.close()
@@ -0,0 +1,96 @@
+"""
+Shapes of the large responses, used by JSONDecoder(typed=True) to decode them directly
+(with msgspec) into dicts holding just these fields, type checked.
+"""
+from typing import Any, Dict, List, Optional, TypedDict
+
+
+class Product(TypedDict, total=False):
+    id: str
+    name: str
+    isin: str
+    symbol: str
+    contractSize: Optional[float]
+    productType: str
+    productTypeId: int
+    tradable: bool
+    category: Optional[str]
+    currency: str
+    exchangeId: Optional[str]
+    active: Optional[bool]
+    onlyEodPrices: Optional[bool]
+    orderTimeTypes: List[str]
+    buyOrderTypes: List[str]
+    sellOrderTypes: List[str]
+    productBitTypes: List[str]
+    closePrice: Optional[float]
+    closePriceDate: Optional[str]
+    feedQuality: Optional[str]
+    feedQualitySecondary: Optional[str]
+    orderBookDepth: Optional[int]
+    vwdIdentifierType: Optional[str]
+    vwdIdentifierTypeSecondary: Optional[str]
+    vwdId: Optional[str]
+    vwdIdSecondary: Optional[str]
+    vwdModuleId: Optional[int]
+    vwdModuleIdSecondary: Optional[int]
+    qualitySwitchable: Optional[bool]
+    qualitySwitchFree: Optional[bool]
+    strikePrice: Optional[float]
+    expirationDate: Optional[str]
+    underlyingProductId: Optional[int]
+
+
+class StockList(TypedDict, total=False):
+    offset: int
+    total: int
+    products: List[Product]
+
+
+class ProductInfo(TypedDict, total=False):
+    data: Dict[str, Product]
+
+
+class Transaction(TypedDict, total=False):
+    id: int
+    productId: int
+    date: str
+    buysell: str
+    price: float
+    quantity: float
+    total: float
+    orderTypeId: Optional[int]
+    counterParty: Optional[str]
+    transfered: bool
+    fxRate: Optional[float]
+    nettFxRate: Optional[float]
+    grossFxRate: Optional[float]
+    autoFxFeeInBaseCurrency: Optional[float]
+    totalInBaseCurrency: Optional[float]
+    feeInBaseCurrency: Optional[float]
+    totalFeesInBaseCurrency: Optional[float]
+    totalPlusFeeInBaseCurrency: Optional[float]
+    totalPlusAllFeesInBaseCurrency: Optional[float]
+    transactionTypeId: Optional[int]
+    tradingVenue: Optional[str]
+    executingEntityId: Optional[str]
+
+
+class Transactions(TypedDict, total=False):
+    data: List[Transaction]
+
+
+class UpdateBlock(TypedDict, total=False):
+    lastUpdated: int
+    name: str
+    value: Any
+
+
+class Update(TypedDict, total=False):
+    portfolio: UpdateBlock
+    cashFunds: UpdateBlock
+    orders: UpdateBlock
+    historicalOrders: UpdateBlock
+    transactions: UpdateBlock
+    alerts: UpdateBlock
+    totalPortfolio: UpdateBlock
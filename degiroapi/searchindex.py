@@ -0,0 +1,151 @@
+import bisect
+import difflib
+import re
+import threading
+
+
+def normalize(text):
+    """Case-folded text with punctuation turned into single spaces, for name matching."""
+    return ' '.join(re.sub(r'[^\w]+', ' ', text.casefold()).split())
+
+
+class ProductIndex:
+    """
+    Local index of product payloads (stock lists, search results) answering searches without
+    a round trip: exact id, ISIN and symbol lookups are dict hits and names match by prefix of
+    the whole name or of each word. With fuzzy=True (off by default, for interactive use)
+    words that match nothing are retried with close spellings. Filled by
+    ``DeGiro.get_stock_list_by_country`` / ``get_stock_list`` / ``iter_stocks`` and by the
+    remote searches once it is set as ``product_index``.
+    """
+
+    def __init__(self, products=(), fuzzy=False, fuzzy_cutoff=0.75):
+        self.fuzzy = fuzzy
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.hits = 0
+        self.misses = 0
+        self.__products = {}
+        self.__isins = {}
+        self.__symbols = {}
+        # sorted lists that searches bisect; add() only appends to __new_names and a snapshot
+        # replaces them (never sorts them in place), so a search keeps a consistent copy
+        self.__names = []
+        self.__new_names = []
+        self.__words = {}
+        self.__word_list = []
+        self.__lock = threading.Lock()
+        self.add(products)
+
+    def __len__(self):
+        return len(self.__products)
+
+    def __contains__(self, product_id):
+        return str(product_id) in self.__products
+
+    def add(self, products):
+        """Indexes product payloads (dicts or Models), replacing those with the same id. Returns how many were new."""
+        added = 0
+        with self.__lock:
+            for product in products:
+                product = getattr(product, 'raw', product)
+                product_id = str(product['id'])
+                if product_id not in self.__products:
+                    added += 1
+                    name = normalize(product.get('name') or '')
+                    self.__new_names.append((name, product_id))
+                    for word in set(name.split()):
+                        self.__words.setdefault(word, set()).add(product_id)
+                    if product.get('isin'):
+                        self.__isins.setdefault(product['isin'].upper(), []).append(product_id)
+                    if product.get('symbol'):
+                        self.__symbols.setdefault(product['symbol'].upper(), []).append(product_id)
+                self.__products[product_id] = product
+        return added
+
+    def get(self, product_id):
+        return self.__products.get(str(product_id))
+
+    def lookup(self, text):
+        """The products whose id, ISIN or symbol is exactly text (case-insensitive)."""
+        key = text.strip().upper()
+        if key in self.__products:
+            return [self.__products[key]]
+        ids = self.__isins.get(key) or self.__symbols.get(key) or []
+        return [self.__products[product_id] for product_id in ids]
+
+    def search(self, text, limit=10, product_type=None, fuzzy=None):
+        """
+        Up to limit products matching text, best first: exact id / ISIN / symbol matches,
+        then names starting with text, then names with a word starting with every word of
+        text (close spellings too, with fuzzy; self.fuzzy by default). product_type (e.g.
+        'STOCK') filters them.
+        """
+        if fuzzy is None:
+            fuzzy = self.fuzzy
+        def wanted(product_id):
+            return product_type is None or self.__products[product_id].get('productType') == product_type
+
+        found = dict.fromkeys(str(product['id']) for product in self.lookup(text) if wanted(str(product['id'])))
+        query = normalize(text)
+        if query and len(found) < limit:
+            names, word_list = self.__snapshot()
+            i = bisect.bisect_left(names, (query,))
+            while i < len(names) and names[i][0].startswith(query) and len(found) < limit:
+                if wanted(names[i][1]):
+                    found[names[i][1]] = None
+                i += 1
+            if len(found) < limit:
+                for product_id in sorted(self.__word_matches(query.split(), word_list, fuzzy),
+                                         key=lambda product_id: self.__products[product_id].get('name') or ''):
+                    if len(found) >= limit:
+                        break
+                    if wanted(product_id):
+                        found[product_id] = None
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return [self.__products[product_id] for product_id in list(found)[:limit]]
+
+    def __word_matches(self, words, word_list, fuzzy):
+        ids = None
+        for word in words:
+            matches = self.__prefixed(word, word_list)
+            if not matches and fuzzy:
+                for close in difflib.get_close_matches(word, word_list, n=5, cutoff=self.fuzzy_cutoff):
+                    matches |= self.__words[close]
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                return set()
+        return ids or set()
+
+    def __prefixed(self, word, words):
+        matches = set()
+        i = bisect.bisect_left(words, word)
+        while i < len(words) and words[i].startswith(word):
+            matches |= self.__words[words[i]]
+            i += 1
+        return matches
+
+    def __snapshot(self):
+        """The sorted (name, id) and word lists, including everything added so far."""
+        with self.__lock:
+            if self.__new_names:
+                self.__names = sorted(self.__names + self.__new_names)
+                self.__new_names = []
+                self.__word_list = sorted(self.__words)
+            return self.__names, self.__word_list
+
+    def clear(self):
+        with self.__lock:
+            self.__products.clear()
+            self.__isins.clear()
+            self.__symbols.clear()
+            self.__names = []
+            self.__new_names = []
+            self.__words.clear()
+            self.__word_list = []
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {'size': len(self.__products), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,108 @@
+from collections import namedtuple
+from degiroapi.datatypes import Data
+
+Change = namedtuple('Change', ['datatype', 'id', 'kind', 'old', 'new'])
+Change.__doc__ = """A row (or for totalPortfolio, a field) that was 'added', 'changed' or 'removed' by a sync."""
+
+
+class AccountState:
+    """
+    In-memory copy of the update endpoint's data, kept current with deltas.
+
+    ``payload()`` is what to send to the update endpoint: for every data type the
+    lastUpdated token of the previous response (0 the first time, i.e. a full
+    snapshot). ``apply()`` merges a response in and returns the resulting
+    ``Change`` events, which are also passed to every subscribed callback.
+
+    Rows are kept as ``{row id: {field name: value}}`` per data type, except
+    totalPortfolio which has no rows and is kept as ``{field name: value}``.
+    """
+
+    DEFAULT_DATATYPES = (Data.Type.PORTFOLIO, Data.Type.CASHFUNDS, Data.Type.ORDERS, Data.Type.TOTALPORTFOLIO)
+
+    def __init__(self, datatypes=DEFAULT_DATATYPES):
+        self.datatypes = tuple(datatypes)
+        self.tokens = {datatype: 0 for datatype in self.datatypes}
+        self.data = {datatype: {} for datatype in self.datatypes}
+        self.__subscribers = []
+
+    def track(self, datatype):
+        """Adds datatype to the synced data types (its first sync is a full snapshot)."""
+        if datatype not in self.datatypes:
+            self.datatypes += (datatype,)
+            self.tokens[datatype] = 0
+            self.data[datatype] = {}
+
+    def subscribe(self, callback):
+        self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.__subscribers.remove(callback)
+
+    def payload(self):
+        return dict(self.tokens)
+
+    def apply(self, response):
+        changes = []
+        for datatype in self.datatypes:
+            block = response.get(datatype) if isinstance(response, dict) else None
+            if not block:
+                continue
+            full = self.tokens[datatype] == 0
+            if 'lastUpdated' in block:
+                self.tokens[datatype] = block['lastUpdated']
+            values = block.get('value')
+            if values is None:
+                continue
+            if values and 'id' not in values[0]:
+                changes += self.__merge_fields(datatype, values)
+            else:
+                changes += self.__merge_rows(datatype, values, full)
+        for change in changes:
+            for callback in self.__subscribers:
+                callback(change)
+        return changes
+
+    def __merge_rows(self, datatype, rows, full):
+        current = self.data[datatype]
+        changes = []
+        seen = set()
+        for row in rows:
+            row_id = row['id']
+            seen.add(row_id)
+            old = current.get(row_id)
+            if row.get('isRemoved'):
+                if old is not None:
+                    del current[row_id]
+                    changes.append(Change(datatype, row_id, 'removed', old, None))
+                continue
+            fields = {field['name']: field.get('value') for field in row.get('value', [])}
+            new = fields if row.get('isAdded') or old is None else dict(old, **fields)
+            if new != old:
+                current[row_id] = new
+                changes.append(Change(datatype, row_id, 'added' if old is None else 'changed', old, new))
+        if full:
+            for row_id in [row_id for row_id in current if row_id not in seen]:
+                changes.append(Change(datatype, row_id, 'removed', current.pop(row_id), None))
+        return changes
+
+    def __merge_fields(self, datatype, fields):
+        current = self.data[datatype]
+        changes = []
+        for field in fields:
+            old = current.get(field['name'])
+            new = field.get('value')
+            if new != old:
+                current[field['name']] = new
+                changes.append(Change(datatype, field['name'], 'added' if old is None else 'changed', old, new))
+        return changes
+
+    def snapshot(self, datatype):
+        """The data of one type in the shape of an update response, e.g. for DeGiro.filterportfolio."""
+        current = self.data[datatype]
+        if datatype == Data.Type.TOTALPORTFOLIO:
+            value = [{'name': name, 'value': v} for name, v in current.items()]
+        else:
+            value = [{'id': row_id, 'value': [{'name': name, 'value': v} for name, v in row.items()]}
+                     for row_id, row in current.items()]
+        return {datatype: {'lastUpdated': self.tokens[datatype], 'name': datatype, 'value': value}}
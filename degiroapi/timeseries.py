@@ -0,0 +1,115 @@
+import re
+
+COLUMNS = {
+    2: ('price',),
+    5: ('open', 'high', 'low', 'close'),
+}
+# numpy timedelta64 units of the ISO 8601 time designators (the date ones, Y M W D, are the same)
+_TIME_UNITS = {'H': 'h', 'M': 'm', 'S': 's'}
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError('NumPy arrays require numpy, install it with: pip install numpy')
+    return np
+
+
+def resolution_step(resolution):
+    """The numpy timedelta64 of a vwd resolution such as 'PT1M', 'PT1H', 'P1D' or 'P1M'."""
+    np = _numpy()
+    match = re.fullmatch(r'P(?:(\d+)([YMWD]))?(?:T(\d+)([HMS]))?', resolution)
+    if not match or not (match.group(1) or match.group(3)):
+        raise ValueError(f'Unsupported resolution {resolution!r}')
+    if match.group(1) and match.group(3):
+        raise ValueError(f'Unsupported resolution {resolution!r}: mixes date and time parts')
+    if match.group(1):
+        return np.timedelta64(int(match.group(1)), match.group(2))
+    return np.timedelta64(int(match.group(3)), _TIME_UNITS[match.group(4)])
+
+
+def period_start(end, period):
+    """end (datetime64) minus a vwd period such as 'P1D', 'P1M' or 'P5Y', to the second."""
+    np = _numpy()
+    step = resolution_step(period)
+    end = np.datetime64(end, 's')
+    if np.datetime_data(step.dtype)[0] in ('Y', 'M'):
+        month = end.astype('datetime64[M]')
+        return (month - step).astype('datetime64[s]') + (end - month.astype('datetime64[s]'))
+    return end - step
+
+
+def period_seconds(period):
+    """The length of a vwd period in seconds, counted back from now."""
+    np = _numpy()
+    end = np.datetime64('now', 's')
+    return int((end - period_start(end, period)) / np.timedelta64(1, 's'))
+
+
+def parse_series(series):
+    """
+    Turns a 'time' series of the vwd chart endpoint (real_time_price) into NumPy arrays in
+    one step: 'time' (datetime64, the local exchange time the endpoint reports) and float64
+    'price', or 'open', 'high', 'low' and 'close' for an ohlc series. Missing values are NaN.
+    """
+    np = _numpy()
+    start, _, resolution = series['times'].partition('/')
+    step = resolution_step(resolution)
+    data = np.array(series.get('data') or [], dtype=np.float64)
+    if data.ndim != 2:
+        data = data.reshape(0, 5 if str(series.get('id', '')).startswith('ohlc:') else 2)
+    columns = COLUMNS.get(data.shape[1])
+    if columns is None:
+        raise ValueError(f'Unexpected series with {data.shape[1]} values per point')
+    offsets = data[:, 0].astype(np.int64)
+    if np.datetime_data(step.dtype)[0] in ('Y', 'M'):
+        # months and years have no fixed length: count them from the start month, then add the day and time
+        month = np.datetime64(start[:7], 'M')
+        times = (month + offsets * step).astype('datetime64[s]') + (np.datetime64(start, 's') - month.astype('datetime64[s]'))
+    else:
+        times = np.datetime64(start, 's') + offsets * step
+    arrays = {'time': times.astype('datetime64[s]')}
+    for n, name in enumerate(columns, 1):
+        arrays[name] = np.ascontiguousarray(data[:, n])
+    return arrays
+
+
+def time_series(response_series):
+    """The 'time' series among the series real_time_price returns (the other one describes the product)."""
+    for series in response_series:
+        if series.get('type') == 'time':
+            return series
+    return response_series[-1]
+
+
+def align_series(arrays_by_key, field=None, how='outer'):
+    """
+    Puts the field (default 'price', or 'close' for ohlc) of several parse_series results on
+    one time index. how='outer' uses every time of any of them, with NaN where a series has
+    no value; 'inner' only the times all of them have. Returns (times, {key: values}).
+    """
+    np = _numpy()
+    if how not in ('outer', 'inner'):
+        raise ValueError("how should be 'outer' or 'inner'")
+    if not arrays_by_key:
+        return np.array([], dtype='datetime64[s]'), {}
+    index = None
+    for arrays in arrays_by_key.values():
+        times = arrays['time']
+        if index is None:
+            index = np.unique(times)
+        elif how == 'outer':
+            index = np.union1d(index, times)
+        else:
+            index = np.intersect1d(index, times)
+    aligned = {}
+    for key, arrays in arrays_by_key.items():
+        name = field or ('price' if 'price' in arrays else 'close')
+        values = np.full(len(index), np.nan)
+        positions = np.searchsorted(index, arrays['time'])
+        found = positions < len(index)
+        found[found] &= index[positions[found]] == arrays['time'][found]
+        values[positions[found]] = arrays[name][found]
+        aligned[key] = values
+    return index, aligned
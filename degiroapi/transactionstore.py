@@ -0,0 +1,73 @@
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+
+
+class TransactionStore:
+    """
+    Local SQLite copy of the transactions of an account, filled by ``DeGiro.sync_transactions``.
+
+    Transactions are stored once per transaction id; ``synced_until`` is the last
+    date that has been fetched completely, so a sync only asks for what came after.
+    Use ``path=':memory:'`` (the default) for a store that only lives in this process.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS transactions '
+                              '(id INTEGER PRIMARY KEY, product_id INTEGER, day TEXT, data TEXT)')
+            self.__db.execute('CREATE INDEX IF NOT EXISTS transactions_product ON transactions (product_id, day)')
+            self.__db.execute('CREATE INDEX IF NOT EXISTS transactions_day ON transactions (day)')
+            self.__db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+    def __len__(self):
+        with self.__lock:
+            return self.__db.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+
+    @property
+    def synced_until(self):
+        with self.__lock:
+            row = self.__db.execute("SELECT value FROM meta WHERE key = 'synced_until'").fetchone()
+        return date.fromisoformat(row[0]) if row else None
+
+    @synced_until.setter
+    def synced_until(self, day):
+        with self.__lock, self.__db:
+            self.__db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('synced_until', ?)",
+                              (_day(day),))
+
+    def add(self, transactions):
+        """Stores transactions, skipping ids that are already stored. Returns how many were new."""
+        with self.__lock, self.__db:
+            before = self.__db.total_changes
+            self.__db.executemany('INSERT OR IGNORE INTO transactions (id, product_id, day, data) VALUES (?, ?, ?, ?)',
+                                  [(t['id'], t.get('productId'), t['date'][:10], json.dumps(t)) for t in transactions])
+            return self.__db.total_changes - before
+
+    def query(self, product_id=None, from_date=None, to_date=None):
+        """Stored transactions in date order, optionally for one product and/or between two dates (inclusive)."""
+        conditions = []
+        args = []
+        if product_id is not None:
+            conditions.append('product_id = ?')
+            args.append(int(product_id))
+        if from_date is not None:
+            conditions.append('day >= ?')
+            args.append(_day(from_date))
+        if to_date is not None:
+            conditions.append('day <= ?')
+            args.append(_day(to_date))
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        with self.__lock:
+            rows = self.__db.execute(f'SELECT data FROM transactions{where} ORDER BY day, id', args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        self.__db.close()
+
+
+def _day(value):
+    return (value.date() if isinstance(value, datetime) else value).isoformat()
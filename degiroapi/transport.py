@@ -0,0 +1,215 @@
+import asyncio
+import contextlib
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from degiroapi.core import USER_AGENT, encode_params
+
+
+class BaseTransport:
+    """
+    Connection settings and retry policy shared by the sync and the async transport.
+
+    pool_size: connections kept open per host.
+    timeout: (connect, read) timeouts in seconds.
+    retries: how often an idempotent request (GET, or one marked idempotent) is retried after
+    a connection error, a timeout or a status in retry_statuses. The delay before attempt n
+    is random between 0 and min(max_backoff, backoff * 2 ** n) ("full jitter"), or the
+    response's Retry-After (seconds or an HTTP date), capped at max_backoff, when it has one.
+    base_urls: maps origins to the origin to send their requests to instead, e.g.
+    {'https://trader.degiro.nl': 'http://127.0.0.1:8000'} to talk to a local stand-in.
+    """
+
+    def __init__(self, pool_size=10, timeout=(10, 60), retries=3, backoff=0.5, max_backoff=30,
+                 retry_statuses=(429, 500, 502, 503, 504), base_urls=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.base_urls = base_urls or {}
+
+    def _url(self, request):
+        for origin, replacement in self.base_urls.items():
+            if request.url.startswith(origin):
+                return replacement + request.url[len(origin):]
+        return request.url
+
+    def _attempts(self, request):
+        return self.retries + 1 if request.idempotent else 1
+
+    def _delay(self, attempt, headers=None):
+        retry_after = headers.get('Retry-After') if headers else None
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    seconds = None
+            if seconds is not None:
+                return min(self.max_backoff, max(seconds, 0))
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class Transport(BaseTransport):
+    """Blocking transport on a requests.Session owned by one client."""
+
+    def __init__(self, pool_size=10, timeout=(10, 60), retries=3, backoff=0.5, max_backoff=30,
+                 retry_statuses=(429, 500, 502, 503, 504), base_urls=None):
+        super().__init__(pool_size, timeout, retries, backoff, max_backoff, retry_statuses, base_urls)
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def send(self, request):
+        """
+        Performs the request and returns (status code, body bytes); sets request.attempts,
+        request.response_bytes and request.response_headers.
+        """
+        attempts = self._attempts(request)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            request.attempts = attempt + 1
+            headers = None
+            try:
+                response = self.session.request(request.method, self._url(request), params=request.params, json=request.json,
+                                                data=request.data, headers=request.headers, cookies=request.cookies,
+                                                timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if last or response.status_code not in self.retry_statuses:
+                    request.response_bytes = len(response.content)
+                    request.response_headers = response.headers
+                    return response.status_code, response.content
+                headers = response.headers
+            time.sleep(self._delay(attempt, headers))
+
+    @contextlib.contextmanager
+    def stream(self, request, chunk_size=64 * 1024):
+        """
+        Performs the request and gives (status code, iterator over the body in chunks of bytes)
+        while the body is read; sets request.attempts and request.response_headers. Opening
+        the response is retried like send(), reading the body is not.
+        """
+        attempts = self._attempts(request)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            request.attempts = attempt + 1
+            headers = None
+            try:
+                response = self.session.request(request.method, self._url(request), params=request.params,
+                                                json=request.json, data=request.data, headers=request.headers,
+                                                cookies=request.cookies, timeout=self.timeout, stream=True)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if last or response.status_code not in self.retry_statuses:
+                    break
+                headers = response.headers
+                response.close()
+            time.sleep(self._delay(attempt, headers))
+        try:
+            request.response_headers = response.headers
+            yield response.status_code, response.iter_content(chunk_size)
+        finally:
+            response.close()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncTransport(BaseTransport):
+    """asyncio transport on an aiohttp.ClientSession owned by one client, created on first use."""
+
+    def __init__(self, pool_size=100, timeout=(10, 60), retries=3, backoff=0.5, max_backoff=30,
+                 retry_statuses=(429, 500, 502, 503, 504), base_urls=None):
+        super().__init__(pool_size, timeout, retries, backoff, max_backoff, retry_statuses, base_urls)
+        self.session = None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError('AsyncDeGiro requires aiohttp, install it with: pip install aiohttp')
+            self.session = aiohttp.ClientSession(headers={'User-Agent': USER_AGENT},
+                                                 connector=aiohttp.TCPConnector(limit=self.pool_size),
+                                                 timeout=aiohttp.ClientTimeout(sock_connect=self.timeout[0],
+                                                                               sock_read=self.timeout[1]))
+        return self.session
+
+    async def send(self, request):
+        """
+        Performs the request and returns (status code, body bytes); sets request.attempts,
+        request.response_bytes and request.response_headers.
+        """
+        import aiohttp
+        session = self._get_session()
+        attempts = self._attempts(request)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            request.attempts = attempt + 1
+            headers = None
+            try:
+                async with session.request(request.method, self._url(request), params=encode_params(request.params),
+                                           json=request.json, data=request.data, headers=request.headers,
+                                           cookies=request.cookies) as response:
+                    if last or response.status not in self.retry_statuses:
+                        body = await response.read()
+                        request.response_bytes = len(body)
+                        request.response_headers = response.headers
+                        return response.status, body
+                    headers = response.headers
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last:
+                    raise
+            await asyncio.sleep(self._delay(attempt, headers))
+
+    @contextlib.asynccontextmanager
+    async def stream(self, request, chunk_size=64 * 1024):
+        """
+        Performs the request and gives (status code, async iterator over the body in chunks of
+        bytes) while the body is read; sets request.attempts and request.response_headers.
+        Opening the response is retried like send(), reading the body is not.
+        """
+        import aiohttp
+        session = self._get_session()
+        attempts = self._attempts(request)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            request.attempts = attempt + 1
+            headers = None
+            try:
+                response = await session.request(request.method, self._url(request),
+                                                 params=encode_params(request.params), json=request.json,
+                                                 data=request.data, headers=request.headers, cookies=request.cookies)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last:
+                    raise
+            else:
+                if last or response.status not in self.retry_statuses:
+                    break
+                headers = response.headers
+                response.release()
+            await asyncio.sleep(self._delay(attempt, headers))
+        try:
+            request.response_headers = response.headers
+            yield response.status, response.content.iter_chunked(chunk_size)
+        finally:
+            response.release()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
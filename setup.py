@@ -18,8 +18,13 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     install_requires=[
         'requests'
-    ]
+    ],
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+        'typed': ['msgspec'],
+    }
 )